@@ -16,9 +16,7 @@ Blender材质着色器批量替换插件 - 模块化版本
 """
 
 # 插件元数据
-from . import operators, properties, ui, node_config, translations
-from bpy.utils import register_class, unregister_class
-import bpy
+# 子模块在 register() 中才导入，Blender 扫描未启用的插件时只需读取 bl_info
 bl_info = {
     "name": "材质着色器批量替换工具",
     "author": "Homura59",
@@ -31,38 +29,43 @@ bl_info = {
     "category": "Material",
 }
 
+# register() 中实际注册成功的操作符与UI类，unregister() 只注销这些类
+_registered_classes = []
 
-def register():
-    """注册插件"""
-    # 首先注册 properties 模块中的类
-    properties.register()
 
-    # 然后注册其他类
-    operator_classes = (
+def _get_classes():
+    """操作符与UI类（按注册顺序排列，注销时逆序）"""
+    from . import operators, ui
+    return (
         operators.MATERIAL_OT_add_connection_rule,
         operators.MATERIAL_OT_remove_connection_rule,
+        operators.MATERIAL_OT_clear_connection_snapshot,
         operators.MATERIAL_OT_disconnect_all_connections,
         operators.MATERIAL_OT_reconnect_with_rules,
         operators.MATERIAL_OT_batch_replace_shader,
-    )
-
-    for cls in operator_classes:
-        try:
-            register_class(cls)
-        except ValueError as e:
-            print(f"注册失败 {cls.__name__}: {e}")
-
-    ui_classes = (
         ui.MATERIAL_UL_connection_rule_list,
         ui.MATERIAL_PT_shader_replacer_panel,
-        ui.MATERIAL_PT_shader_replacer_material
+        ui.MATERIAL_PT_shader_replacer_material,
     )
 
-    for cls in ui_classes:
+
+def register():
+    """注册插件"""
+    import bpy
+    from bpy.utils import register_class
+    from . import properties, node_config, cache, translations
+
+    # 首先注册 properties 模块中的类
+    properties.register()
+
+    # 然后注册其他类（单个类失败不影响其余类）
+    for cls in _get_classes():
         try:
             register_class(cls)
         except ValueError as e:
             print(f"注册失败 {cls.__name__}: {e}")
+        else:
+            _registered_classes.append(cls)
 
     # 将属性设置到场景
     from bpy.types import Scene
@@ -73,54 +76,40 @@ def register():
     # 注册节点配置
     node_config.register()
 
+    # 注册缓存失效通知
+    cache.register()
+
     # 注册翻译
-    bpy.app.translations.register(__name__, translations.translations_dict)
+    translations.register()
 
     print("材质着色器批量替换插件 v1.3.6 注册完成")
 
 
 def unregister():
     """注销插件"""
+    from bpy.utils import unregister_class
+    from . import properties, node_config, cache, translations
+
     # 注销翻译
-    try:
-        bpy.app.translations.unregister(__name__)
-    except:
-        pass
+    translations.unregister()
 
     from bpy.types import Scene
     if hasattr(Scene, "shader_replacer_props"):
         delattr(Scene, "shader_replacer_props")
 
+    # 注销缓存失效通知
+    cache.unregister()
+
     # 注销节点配置
     node_config.unregister()
 
-    # UI类
-    ui_classes = (
-        ui.MATERIAL_PT_shader_replacer_material,
-        ui.MATERIAL_PT_shader_replacer_panel,
-        ui.MATERIAL_UL_connection_rule_list,
-    )
-
-    for cls in ui_classes:
-        try:
-            unregister_class(cls)
-        except RuntimeError as e:
-            print(f"注销失败 {cls.__name__}: {e}")
-
-    # 操作符类
-    operator_classes = (
-        operators.MATERIAL_OT_batch_replace_shader,
-        operators.MATERIAL_OT_reconnect_with_rules,
-        operators.MATERIAL_OT_disconnect_all_connections,
-        operators.MATERIAL_OT_remove_connection_rule,
-        operators.MATERIAL_OT_add_connection_rule,
-    )
-
-    for cls in operator_classes:
+    # 操作符与UI类（逆序注销，只处理注册成功的类）
+    for cls in reversed(_registered_classes):
         try:
             unregister_class(cls)
         except RuntimeError as e:
             print(f"注销失败 {cls.__name__}: {e}")
+    _registered_classes.clear()
 
     # 最后注销 properties 模块中的类
     properties.unregister()
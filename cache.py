@@ -4,46 +4,119 @@
 """
 
 import bpy
+from bpy.app.handlers import persistent
 
 
-class MaterialCache:
-    """材质处理缓存 - 避免重复处理相同材质"""
-    _processed_materials = {}
+# 材质处理缓存 - 避免重复处理相同材质
+# 以材质数据块指针为键，缓存仅在单次操作符执行期间有效
+# （每次执行前清空），加载文件时也会清空，避免旧文件的指针被复用。
+# 缓存的是"本次执行中替换了多少个节点"，并非材质的持久状态：
+# 替换后材质已被修改，跨会话保存结果会让下次执行误跳过需要处理的材质，
+# 因此不写入磁盘。
+_processed_materials = {}
 
-    @classmethod
-    def clear(cls):
-        cls._processed_materials.clear()
 
-    @classmethod
-    def is_processed(cls, material):
-        return material.name in cls._processed_materials
+def clear_material_cache():
+    _processed_materials.clear()
 
-    @classmethod
-    def mark_processed(cls, material, result):
-        cls._processed_materials[material.name] = result
 
-    @classmethod
-    def get_result(cls, material):
-        return cls._processed_materials.get(material.name, 0)
+def is_material_processed(material):
+    return material.as_pointer() in _processed_materials
+
+
+def mark_material_processed(material, result):
+    _processed_materials[material.as_pointer()] = result
+
+
+def get_material_result(material):
+    return _processed_materials.get(material.as_pointer(), 0)
 
 
 class NodeGroupCache:
-    """节点组缓存 - 避免重复排序和查询"""
+    """节点组缓存 - 避免重复排序和查询
+
+    节点组重命名通过 msgbus 通知、新增/修改通过 depsgraph 更新通知
+    将缓存标记为脏，下次访问时才重新排序。
+    """
+    __slots__ = ()
+
     _sorted_groups = None
+    _dirty = True
     _last_count = 0
 
     @classmethod
     def get_sorted_shader_node_groups(cls):
+        # 删除节点组不会触发任何通知，数量检查用于避免缓存中残留已释放的数据块
         current_count = len(bpy.data.node_groups)
-        if cls._sorted_groups is None or cls._last_count != current_count:
+        if cls._dirty or cls._sorted_groups is None or cls._last_count != current_count:
             cls._sorted_groups = sorted(
                 [ng for ng in bpy.data.node_groups if ng.type == 'SHADER'],
                 key=lambda x: x.name
             )
             cls._last_count = current_count
+            cls._dirty = False
         return cls._sorted_groups
 
     @classmethod
-    def invalidate(cls):
-        cls._sorted_groups = None
-        cls._last_count = 0
+    def invalidate(cls, *args):
+        cls._dirty = True
+
+
+# msgbus 订阅的所有者标识
+_msgbus_owner = object()
+
+
+def _subscribe_node_group_changes():
+    """订阅节点组重命名通知"""
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    bpy.msgbus.subscribe_rna(
+        key=(bpy.types.NodeTree, "name"),
+        owner=_msgbus_owner,
+        args=(),
+        notify=NodeGroupCache.invalidate,
+    )
+
+
+@persistent
+def _on_depsgraph_update_post(scene, depsgraph):
+    if depsgraph.id_type_updated('NODETREE'):
+        NodeGroupCache.invalidate()
+
+
+@persistent
+def _on_load_post(*args):
+    # 加载文件会清空 msgbus 订阅，需要重新订阅
+    clear_material_cache()
+    NodeGroupCache.invalidate()
+    _subscribe_node_group_changes()
+
+
+@persistent
+def _on_undo_redo_post(*args):
+    NodeGroupCache.invalidate()
+
+
+_HANDLERS = (
+    (bpy.app.handlers.depsgraph_update_post, _on_depsgraph_update_post),
+    (bpy.app.handlers.load_post, _on_load_post),
+    (bpy.app.handlers.undo_post, _on_undo_redo_post),
+    (bpy.app.handlers.redo_post, _on_undo_redo_post),
+)
+
+
+def register():
+    """注册缓存失效通知"""
+    _subscribe_node_group_changes()
+    for handler_list, handler in _HANDLERS:
+        if handler not in handler_list:
+            handler_list.append(handler)
+    NodeGroupCache.invalidate()
+
+
+def unregister():
+    """注销缓存失效通知"""
+    for handler_list, handler in _HANDLERS:
+        if handler in handler_list:
+            handler_list.remove(handler)
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    NodeGroupCache.invalidate()
@@ -25,8 +25,16 @@ class ValidationError(MSRError):
 
 
 def safe_link(links, source_socket, target_socket):
-    """安全地创建节点连接"""
+    """安全地创建节点连接
+
+    先排除空接口和已删除节点上的接口，异常捕获只作为最后的保护，
+    避免在批量重连时把异常当作常规流程。
+    """
+    if source_socket is None or target_socket is None:
+        return False
     try:
+        if not source_socket.node or not target_socket.node:
+            return False
         links.new(source_socket, target_socket)
         return True
     except Exception:
@@ -34,8 +42,12 @@ def safe_link(links, source_socket, target_socket):
 
 
 def safe_remove_node(nodes, node):
-    """安全地删除节点"""
+    """安全地删除节点（节点不在集合中时直接返回 False）"""
+    if node is None:
+        return False
     try:
+        if node.name not in nodes:
+            return False
         nodes.remove(node)
         return True
     except (ReferenceError, RuntimeError):
@@ -1,77 +1,28 @@
 """
 节点类型配置模块 - Blender 4.3 版本
 将所有节点类型定义集中在此处，方便后续修改
+
+注意：EnumProperty 的 items 回调在每次界面重绘时都会被调用，
+且 Blender 不会持有回调返回的字符串。返回的列表必须在 Python 侧
+保持引用（见 bpy.props.EnumProperty 文档中的警告），否则下拉菜单
+会显示乱码甚至崩溃。因此这里的 items 回调都返回缓存的元组。
 """
 
 import bpy
 import re
 from .cache import NodeGroupCache
+from .error_handler import safe_link
+from .semantics import Sem, SocketSemantics
 
 
-class SocketSemantics:
-    """接口语义识别 - 识别接口的实际用途"""
-
-    COLOR_KEYWORDS = ['color', 'base color',
-                      'diffuse', 'albedo', '颜色', '基础色', '漫反射', '反照率']
-    NORMAL_KEYWORDS = ['normal', 'bump', '法线', '凹凸']
-    ROUGHNESS_KEYWORDS = ['roughness', 'rough', 'glossy', 'gloss', '粗糙', '光泽']
-    METALLIC_KEYWORDS = ['metallic', 'metal', '金属']
-    ALPHA_KEYWORDS = ['alpha', 'opacity', 'transparency', '透明', '不透明', 'fac']
-    EMISSION_KEYWORDS = ['emission', 'emissive', 'glow', '自发光', '发光']
-    SPECULAR_KEYWORDS = ['specular', 'spec', 'reflection', '高光', '反射']
-    SUBSURFACE_KEYWORDS = ['subsurface', 'sss', '次表面']
-    AO_KEYWORDS = ['ao', 'ambient occlusion', 'occlusion', '环境光遮蔽', '遮蔽']
-    DISPLACEMENT_KEYWORDS = ['displacement', 'height', 'disp', '置换', '高度']
-
-    @classmethod
-    def get_socket_semantic(cls, socket_name):
-        name_lower = socket_name.lower()
-
-        # 优先匹配更具体的关键词
-        if 'base color' in name_lower or 'basecolor' in name_lower:
-            return 'COLOR'
-        if any(kw in name_lower for kw in cls.NORMAL_KEYWORDS):
-            return 'NORMAL'
-        if any(kw in name_lower for kw in cls.ROUGHNESS_KEYWORDS):
-            return 'ROUGHNESS'
-        if any(kw in name_lower for kw in cls.METALLIC_KEYWORDS):
-            return 'METALLIC'
-        if any(kw in name_lower for kw in cls.ALPHA_KEYWORDS):
-            return 'ALPHA'
-        if any(kw in name_lower for kw in cls.EMISSION_KEYWORDS):
-            return 'EMISSION'
-        if any(kw in name_lower for kw in cls.SPECULAR_KEYWORDS):
-            return 'SPECULAR'
-        if any(kw in name_lower for kw in cls.SUBSURFACE_KEYWORDS):
-            return 'SUBSURFACE'
-        if any(kw in name_lower for kw in cls.AO_KEYWORDS):
-            return 'AO'
-        if any(kw in name_lower for kw in cls.DISPLACEMENT_KEYWORDS):
-            return 'DISPLACEMENT'
-        # 最后检查通用 'color'（避免被 'base color' 误匹配）
-        if 'color' in name_lower or '颜色' in name_lower:
-            return 'COLOR'
-
-        return 'UNKNOWN'
-
-    @classmethod
-    def are_semantically_compatible(cls, output_semantic, input_semantic):
-        if output_semantic == input_semantic:
-            return 100
+def _compile_keywords(keywords):
+    """将关键词列表编译为单个正则（按原顺序组成 alternation）"""
+    return re.compile('|'.join(map(re.escape, keywords)))
 
-        compatibility = {
-            ('COLOR', 'COLOR'): 100,
-            ('COLOR', 'EMISSION'): 80,
-            ('NORMAL', 'NORMAL'): 100,
-            ('ROUGHNESS', 'ROUGHNESS'): 100,
-            ('ROUGHNESS', 'SPECULAR'): 60,
-            ('METALLIC', 'METALLIC'): 100,
-            ('ALPHA', 'ALPHA'): 100,
-            ('AO', 'ROUGHNESS'): 40,
-            ('AO', 'SPECULAR'): 40,
-        }
 
-        return compatibility.get((output_semantic, input_semantic), 0)
+def _shader_class_name(shader_type):
+    """按 Blender 命名规则推导类名，如 'BSDF_PRINCIPLED' -> 'ShaderNodeBsdfPrincipled'"""
+    return 'ShaderNode' + ''.join(part.title() for part in shader_type.split('_'))
 
 
 class NodeTypeConfig:
@@ -85,13 +36,14 @@ class NodeTypeConfig:
 
     如需适配新版本 Blender，只需修改此类中的定义即可。
     """
+    __slots__ = ()
 
     # ----------------------------------------------------------
     # 1. 着色器节点类型集合
     # 用于判断一个节点是否是着色器节点
     # node.type 的值会是这些字符串之一
     # ----------------------------------------------------------
-    SHADER_NODE_TYPES = {
+    SHADER_NODE_TYPES = frozenset({
         # 表面着色器
         'BSDF_PRINCIPLED',      # 原理化BSDF - 最常用的PBR着色器
         'BSDF_DIFFUSE',         # 漫射BSDF
@@ -128,12 +80,12 @@ class NodeTypeConfig:
         'HOLDOUT',              # 阻隔
         'BACKGROUND',           # 背景（用于世界环境）
         'EEVEE_SPECULAR',       # EEVEE高光（仅EEVEE）
-    }
+    })
 
     # ----------------------------------------------------------
     # 2. 纹理节点类型集合
     # ----------------------------------------------------------
-    TEXTURE_NODE_TYPES = {
+    TEXTURE_NODE_TYPES = frozenset({
         'TEX_IMAGE',            # 图像纹理
         'TEX_ENVIRONMENT',      # 环境纹理
         'TEX_SKY',              # 天空纹理
@@ -147,49 +99,35 @@ class NodeTypeConfig:
         'TEX_WHITE_NOISE',      # 白噪波纹理
         'TEX_GABOR',            # Gabor纹理（Blender 4.1 新增）
         'TEX_MUSGRAVE',         # Musgrave纹理（旧版本）
-    }
+    })
+    # ----------------------------------------------------------
+    # 3. 用于验证的内置着色器类型集合
+    # ----------------------------------------------------------
+    BUILTIN_SHADER_TYPES = frozenset([
+        'BSDF_PRINCIPLED', 'BSDF_DIFFUSE', 'BSDF_GLOSSY', 'BSDF_TRANSPARENT',
+        'BSDF_GLASS', 'EMISSION', 'BSDF_ANISOTROPIC', 'BSDF_HAIR',
+        'SUBSURFACE_SCATTERING', 'VOLUME_ABSORPTION', 'VOLUME_SCATTER',
+        'VOLUME_PRINCIPLED', 'MIX_SHADER', 'ADD_SHADER', 'BSDF_SHEEN',
+        'BSDF_TRANSLUCENT', 'BSDF_REFRACTION', 'BSDF_TOON', 'HOLDOUT',
+        'BSDF_HAIR_PRINCIPLED', 'BACKGROUND',
+    ])
+
     # ----------------------------------------------------------
-    # 3. 节点类型 -> Python类名 映射
+    # 4. 节点类型 -> Python类名 映射
     # 用于 nodes.new(type=xxx) 创建新节点
-    # 格式: 'NODE_TYPE': 'ShaderNodeXxx'
+    # 格式: 'NODE_TYPE': 'ShaderNodeXxx'，按命名规则自动生成
+    # （BSDF_ANISOTROPIC -> ShaderNodeBsdfAnisotropic，Blender 4.x 合并后的光泽BSDF 仍使用该类名）
     # ----------------------------------------------------------
     SHADER_TYPE_TO_CLASS = {
-        # 表面着色器
-        'BSDF_PRINCIPLED': 'ShaderNodeBsdfPrincipled',
-        'BSDF_DIFFUSE': 'ShaderNodeBsdfDiffuse',
-        'BSDF_GLOSSY': 'ShaderNodeBsdfGlossy',
-        'BSDF_TRANSPARENT': 'ShaderNodeBsdfTransparent',
-        'BSDF_GLASS': 'ShaderNodeBsdfGlass',
-        'BSDF_TRANSLUCENT': 'ShaderNodeBsdfTranslucent',
-        'BSDF_ANISOTROPIC': 'ShaderNodeBsdfAnisotropic',
-        'BSDF_REFRACTION': 'ShaderNodeBsdfRefraction',
-        'BSDF_TOON': 'ShaderNodeBsdfToon',
-        'BSDF_SHEEN': 'ShaderNodeBsdfSheen',
-
-        # 毛发
-        'BSDF_HAIR': 'ShaderNodeBsdfHair',
-        'BSDF_HAIR_PRINCIPLED': 'ShaderNodeBsdfHairPrincipled',
-
-        # 其他着色器
-        'SUBSURFACE_SCATTERING': 'ShaderNodeSubsurfaceScattering',
-        'EMISSION': 'ShaderNodeEmission',
-        'HOLDOUT': 'ShaderNodeHoldout',
-        'BACKGROUND': 'ShaderNodeBackground',
-        # 体积
-        'VOLUME_ABSORPTION': 'ShaderNodeVolumeAbsorption',
-        'VOLUME_SCATTER': 'ShaderNodeVolumeScatter',
-        'VOLUME_PRINCIPLED': 'ShaderNodeVolumePrincipled',
-
-        # 混合
-        'MIX_SHADER': 'ShaderNodeMixShader',
-        'ADD_SHADER': 'ShaderNodeAddShader',
+        shader_type: _shader_class_name(shader_type)
+        for shader_type in BUILTIN_SHADER_TYPES
     }
 
     # ----------------------------------------------------------
-    # 4. 内置着色器列表（用于下拉菜单）
+    # 5. 内置着色器列表（用于下拉菜单）
     # 格式: (标识符, 显示名称, 描述)
     # ----------------------------------------------------------
-    BUILTIN_SHADERS_FOR_MENU = [
+    BUILTIN_SHADERS_FOR_MENU = (
         ('BSDF_PRINCIPLED', '原理化BSDF (Principled BSDF)', '基础PBR着色器'),
         ('BSDF_DIFFUSE', '漫射BSDF (Diffuse BSDF)', '漫反射着色器'),
         ('BSDF_GLOSSY', '光泽BSDF (Glossy BSDF)', '光泽着色器'),
@@ -206,24 +144,29 @@ class NodeTypeConfig:
         ('VOLUME_PRINCIPLED', '原理化体积 (Principled Volume)', '原理化体积着色器'),
         ('MIX_SHADER', '混合着色器 (Mix Shader)', '混合两个着色器'),
         ('ADD_SHADER', '相加着色器 (Add Shader)', '相加两个着色器'),
-    ]
+    )
+    # 标识符 -> 显示名称，供界面按选中值直接取名称
+    BUILTIN_SHADER_MENU_LABELS = {
+        identifier: label for identifier, label, _description in BUILTIN_SHADERS_FOR_MENU
+    }
 
     # ----------------------------------------------------------
-    # 5. 用于验证的内置着色器类型列表
+    # 6. 着色器关键词（用于识别自定义节点组是否是着色器）
     # ----------------------------------------------------------
-    BUILTIN_SHADER_TYPES = [
-        'BSDF_PRINCIPLED', 'BSDF_DIFFUSE', 'BSDF_GLOSSY', 'BSDF_TRANSPARENT',
-        'BSDF_GLASS', 'EMISSION', 'BSDF_ANISOTROPIC', 'BSDF_HAIR',
-        'SUBSURFACE_SCATTERING', 'VOLUME_ABSORPTION', 'VOLUME_SCATTER',
-        'VOLUME_PRINCIPLED', 'MIX_SHADER', 'ADD_SHADER', 'BSDF_SHEEN',
-        'BSDF_TRANSLUCENT', 'BSDF_REFRACTION', 'BSDF_TOON', 'HOLDOUT',
-        'BSDF_HAIR_PRINCIPLED', 'BACKGROUND',
-    ]
+    SHADER_KEYWORDS = ['shader', 'bsdf', 'material', '着色', '材质', 'surface']
+    _SHADER_KW_RE = _compile_keywords(SHADER_KEYWORDS)
 
     # ----------------------------------------------------------
-    # 6. 着色器关键词（用于识别自定义节点组是否是着色器）
+    # 7. 自定义节点组角色关键词（分组顺序即优先级）
     # ----------------------------------------------------------
-    SHADER_KEYWORDS = ['shader', 'bsdf', 'material', '着色', '材质', 'surface']
+    _ROLE_RE = re.compile(
+        r'(?P<PBR>pbr|principled|原理|标准)'
+        r'|(?P<GLASS>glass|transparent|玻璃|透明)'
+        r'|(?P<TOON>toon|cartoon|cel|卡通)'
+        r'|(?P<HAIR>hair|fur|毛发|毛皮)'
+        r'|(?P<SKIN>skin|sss|皮肤|次表面)'
+    )
+    _ROLE_PRIORITY = {'PBR': 0, 'GLASS': 1, 'TOON': 2, 'HAIR': 3, 'SKIN': 4}
 
     @classmethod
     def identify_custom_shader_role(cls, node):
@@ -233,18 +176,19 @@ class NodeTypeConfig:
 
         name = (node.label if node.label else node.node_tree.name).lower()
 
-        # 识别常见的第三方着色器类型
-        if any(kw in name for kw in ['pbr', 'principled', '原理', '标准']):
-            return 'PBR_SHADER'
-        if any(kw in name for kw in ['glass', 'transparent', '玻璃', '透明']):
-            return 'GLASS_SHADER'
-        if any(kw in name for kw in ['toon', 'cartoon', 'cel', '卡通']):
-            return 'TOON_SHADER'
-        if any(kw in name for kw in ['hair', 'fur', '毛发', '毛皮']):
-            return 'HAIR_SHADER'
-        if any(kw in name for kw in ['skin', 'sss', '皮肤', '次表面']):
-            return 'SKIN_SHADER'
+        # 识别常见的第三方着色器类型：一次扫描找出所有关键词，取优先级最高的角色
+        best_role = None
+        best_priority = len(cls._ROLE_PRIORITY)
+        for match in cls._ROLE_RE.finditer(name):
+            priority = cls._ROLE_PRIORITY[match.lastgroup]
+            if priority < best_priority:
+                best_role = match.lastgroup
+                best_priority = priority
+                if priority == 0:
+                    break
 
+        if best_role:
+            return f'{best_role}_SHADER'
         return 'CUSTOM_SHADER'
     # ----------------------------------------------------------
     # 辅助方法
@@ -271,12 +215,16 @@ class NodeTypeConfig:
                 return True
 
             # 检查名称是否包含着色器关键词
-            ng_name_lower = node.node_tree.name.lower()
-            if any(kw in ng_name_lower for kw in cls.SHADER_KEYWORDS):
+            if cls.has_shader_keyword(node.node_tree.name.lower()):
                 return True
 
         return False
 
+    @classmethod
+    def has_shader_keyword(cls, name_lower):
+        """检查（小写）名称是否包含着色器关键词"""
+        return cls._SHADER_KW_RE.search(name_lower) is not None
+
     @classmethod
     def is_texture_node(cls, node):
         """判断节点是否是纹理节点"""
@@ -300,6 +248,30 @@ class NodeTypeConfig:
         return shader_type in cls.BUILTIN_SHADER_TYPES
 
 
+# ============================================================
+# 节点类别位标志
+# 一次字典查询即可得到节点类型所属的全部类别
+# ============================================================
+NODE_KIND_SHADER = 1
+NODE_KIND_TEXTURE = 2
+NODE_KIND_GROUP = 4
+NODE_KIND_OUTPUT = 8
+
+
+def _build_node_kinds():
+    kinds = {}
+    for node_type in NodeTypeConfig.SHADER_NODE_TYPES:
+        kinds[node_type] = kinds.get(node_type, 0) | NODE_KIND_SHADER
+    for node_type in NodeTypeConfig.TEXTURE_NODE_TYPES:
+        kinds[node_type] = kinds.get(node_type, 0) | NODE_KIND_TEXTURE
+    kinds['GROUP'] = kinds.get('GROUP', 0) | NODE_KIND_GROUP
+    kinds['OUTPUT_MATERIAL'] = kinds.get('OUTPUT_MATERIAL', 0) | NODE_KIND_OUTPUT
+    return kinds
+
+
+_NODE_KINDS = _build_node_kinds()
+
+
 # ============================================================
 # 节点类型映射表（英文类型 -> 中文显示名称）
 # 用于UI显示
@@ -423,95 +395,114 @@ NODE_TYPE_NAMES = {
     'SCRIPT': 'OSL脚本',
 }
 
-# 反向映射（中文名称 -> 英文类型）
-NODE_TYPE_NAMES_REVERSE = {v: k for k, v in NODE_TYPE_NAMES.items()}
+def _build_reverse_node_type_names():
+    """中文名称 -> 英文类型元组（如 '光泽BSDF' 同时对应 BSDF_GLOSSY 和 BSDF_SHEEN）"""
+    reverse = {}
+    for node_type, display_name in NODE_TYPE_NAMES.items():
+        reverse[display_name] = reverse.get(display_name, ()) + (node_type,)
+    return reverse
 
 
-def get_node_type_items(self, context):
-    """获取节点类型列表用于下拉菜单"""
-    items = [('', '-- Select Node Type --', '')]
+# 反向映射（中文名称 -> 英文类型元组）
+NODE_TYPE_NAMES_REVERSE = _build_reverse_node_type_names()
 
-    # 按类别分组
-    categories = {
-        'Shader': ['BSDF_PRINCIPLED', 'BSDF_DIFFUSE', 'BSDF_GLOSSY', 'BSDF_TRANSPARENT',
-                   'BSDF_GLASS', 'EMISSION', 'SUBSURFACE_SCATTERING', 'MIX_SHADER', 'ADD_SHADER'],
-        'Texture': ['TEX_IMAGE', 'TEX_NOISE', 'TEX_VORONOI', 'TEX_WAVE',
-                    'TEX_CHECKER', 'TEX_GRADIENT', 'TEX_BRICK', 'TEX_MAGIC'],
-        'Color': ['MIX', 'MIX_RGB', 'CURVE_RGB', 'INVERT', 'HUE_SAT', 'GAMMA', 'BRIGHTCONTRAST'],
-        'Vector': ['BUMP', 'NORMAL', 'NORMAL_MAP', 'MAPPING', 'DISPLACEMENT', 'VECTOR_MATH'],
-        'Converter': ['VALTORGB', 'RGBTOBW', 'SEPARATE_COLOR', 'COMBINE_COLOR', 'SEPXYZ', 'COMBXYZ'],
-        'Input': ['TEX_COORD', 'UVMAP', 'GEOMETRY', 'OBJECT_INFO', 'ATTRIBUTE', 'FRESNEL',
-                  'LAYER_WEIGHT', 'VALUE', 'RGB', 'VERTEX_COLOR'],
-        'Output': ['OUTPUT_MATERIAL'],
-        'Math': ['MATH', 'CLAMP', 'MAP_RANGE'],
-        'Other': ['GROUP', 'REROUTE', 'FRAME'],
-    }
 
-    # 节点类型英文显示名称
-    node_display_names = {
-        'BSDF_PRINCIPLED': 'Principled BSDF',
-        'BSDF_DIFFUSE': 'Diffuse BSDF',
-        'BSDF_GLOSSY': 'Glossy BSDF',
-        'BSDF_TRANSPARENT': 'Transparent BSDF',
-        'BSDF_GLASS': 'Glass BSDF',
-        'EMISSION': 'Emission',
-        'SUBSURFACE_SCATTERING': 'Subsurface Scattering',
-        'MIX_SHADER': 'Mix Shader',
-        'ADD_SHADER': 'Add Shader',
-        'TEX_IMAGE': 'Image Texture',
-        'TEX_NOISE': 'Noise Texture',
-        'TEX_VORONOI': 'Voronoi Texture',
-        'TEX_WAVE': 'Wave Texture',
-        'TEX_CHECKER': 'Checker Texture',
-        'TEX_GRADIENT': 'Gradient Texture',
-        'TEX_BRICK': 'Brick Texture',
-        'TEX_MAGIC': 'Magic Texture',
-        'MIX': 'Mix',
-        'MIX_RGB': 'Mix RGB',
-        'CURVE_RGB': 'RGB Curves',
-        'INVERT': 'Invert',
-        'HUE_SAT': 'Hue/Saturation',
-        'GAMMA': 'Gamma',
-        'BRIGHTCONTRAST': 'Bright/Contrast',
-        'BUMP': 'Bump',
-        'NORMAL': 'Normal',
-        'NORMAL_MAP': 'Normal Map',
-        'MAPPING': 'Mapping',
-        'DISPLACEMENT': 'Displacement',
-        'VECTOR_MATH': 'Vector Math',
-        'VALTORGB': 'Color Ramp',
-        'RGBTOBW': 'RGB to BW',
-        'SEPARATE_COLOR': 'Separate Color',
-        'COMBINE_COLOR': 'Combine Color',
-        'SEPXYZ': 'Separate XYZ',
-        'COMBXYZ': 'Combine XYZ',
-        'TEX_COORD': 'Texture Coordinate',
-        'UVMAP': 'UV Map',
-        'GEOMETRY': 'Geometry',
-        'OBJECT_INFO': 'Object Info',
-        'ATTRIBUTE': 'Attribute',
-        'FRESNEL': 'Fresnel',
-        'LAYER_WEIGHT': 'Layer Weight',
-        'VALUE': 'Value',
-        'RGB': 'RGB',
-        'VERTEX_COLOR': 'Vertex Color',
-        'OUTPUT_MATERIAL': 'Material Output',
-        'MATH': 'Math',
-        'CLAMP': 'Clamp',
-        'MAP_RANGE': 'Map Range',
-        'GROUP': 'Node Group',
-        'REROUTE': 'Reroute',
-        'FRAME': 'Frame',
-    }
+# ============================================================
+# 节点类型下拉菜单数据
+# ============================================================
+# 常用节点类型（按类别分组）
+_NODE_TYPE_CATEGORIES = {
+    'Shader': ['BSDF_PRINCIPLED', 'BSDF_DIFFUSE', 'BSDF_GLOSSY', 'BSDF_TRANSPARENT',
+               'BSDF_GLASS', 'EMISSION', 'SUBSURFACE_SCATTERING', 'MIX_SHADER', 'ADD_SHADER'],
+    'Texture': ['TEX_IMAGE', 'TEX_NOISE', 'TEX_VORONOI', 'TEX_WAVE',
+                'TEX_CHECKER', 'TEX_GRADIENT', 'TEX_BRICK', 'TEX_MAGIC'],
+    'Color': ['MIX', 'MIX_RGB', 'CURVE_RGB', 'INVERT', 'HUE_SAT', 'GAMMA', 'BRIGHTCONTRAST'],
+    'Vector': ['BUMP', 'NORMAL', 'NORMAL_MAP', 'MAPPING', 'DISPLACEMENT', 'VECTOR_MATH'],
+    'Converter': ['VALTORGB', 'RGBTOBW', 'SEPARATE_COLOR', 'COMBINE_COLOR', 'SEPXYZ', 'COMBXYZ'],
+    'Input': ['TEX_COORD', 'UVMAP', 'GEOMETRY', 'OBJECT_INFO', 'ATTRIBUTE', 'FRESNEL',
+              'LAYER_WEIGHT', 'VALUE', 'RGB', 'VERTEX_COLOR'],
+    'Output': ['OUTPUT_MATERIAL'],
+    'Math': ['MATH', 'CLAMP', 'MAP_RANGE'],
+    'Other': ['GROUP', 'REROUTE', 'FRAME'],
+}
+
+# 节点类型英文显示名称
+_NODE_DISPLAY_NAMES_EN = {
+    'BSDF_PRINCIPLED': 'Principled BSDF',
+    'BSDF_DIFFUSE': 'Diffuse BSDF',
+    'BSDF_GLOSSY': 'Glossy BSDF',
+    'BSDF_TRANSPARENT': 'Transparent BSDF',
+    'BSDF_GLASS': 'Glass BSDF',
+    'EMISSION': 'Emission',
+    'SUBSURFACE_SCATTERING': 'Subsurface Scattering',
+    'MIX_SHADER': 'Mix Shader',
+    'ADD_SHADER': 'Add Shader',
+    'TEX_IMAGE': 'Image Texture',
+    'TEX_NOISE': 'Noise Texture',
+    'TEX_VORONOI': 'Voronoi Texture',
+    'TEX_WAVE': 'Wave Texture',
+    'TEX_CHECKER': 'Checker Texture',
+    'TEX_GRADIENT': 'Gradient Texture',
+    'TEX_BRICK': 'Brick Texture',
+    'TEX_MAGIC': 'Magic Texture',
+    'MIX': 'Mix',
+    'MIX_RGB': 'Mix RGB',
+    'CURVE_RGB': 'RGB Curves',
+    'INVERT': 'Invert',
+    'HUE_SAT': 'Hue/Saturation',
+    'GAMMA': 'Gamma',
+    'BRIGHTCONTRAST': 'Bright/Contrast',
+    'BUMP': 'Bump',
+    'NORMAL': 'Normal',
+    'NORMAL_MAP': 'Normal Map',
+    'MAPPING': 'Mapping',
+    'DISPLACEMENT': 'Displacement',
+    'VECTOR_MATH': 'Vector Math',
+    'VALTORGB': 'Color Ramp',
+    'RGBTOBW': 'RGB to BW',
+    'SEPARATE_COLOR': 'Separate Color',
+    'COMBINE_COLOR': 'Combine Color',
+    'SEPXYZ': 'Separate XYZ',
+    'COMBXYZ': 'Combine XYZ',
+    'TEX_COORD': 'Texture Coordinate',
+    'UVMAP': 'UV Map',
+    'GEOMETRY': 'Geometry',
+    'OBJECT_INFO': 'Object Info',
+    'ATTRIBUTE': 'Attribute',
+    'FRESNEL': 'Fresnel',
+    'LAYER_WEIGHT': 'Layer Weight',
+    'VALUE': 'Value',
+    'RGB': 'RGB',
+    'VERTEX_COLOR': 'Vertex Color',
+    'OUTPUT_MATERIAL': 'Material Output',
+    'MATH': 'Math',
+    'CLAMP': 'Clamp',
+    'MAP_RANGE': 'Map Range',
+    'GROUP': 'Node Group',
+    'REROUTE': 'Reroute',
+    'FRAME': 'Frame',
+}
+
 
+def _build_node_type_items(categories, display_names):
+    """按类别构建节点类型下拉菜单项（每个类别前加一个分隔项）"""
+    items = [('', '-- Select Node Type --', '')]
     for category, types in categories.items():
         # 添加分隔符
         items.append((f'__{category}__', f'-- {category} --', ''))
         for node_type in types:
-            display_name = node_display_names.get(node_type, node_type)
+            display_name = display_names.get(node_type, node_type)
             items.append((node_type, display_name, f'Node type: {node_type}'))
+    return tuple(items)
+
+
+# 节点类型是固定的，items 只在导入时构建一次（元组同时保证字符串一直被引用）
+_NODE_TYPE_ITEMS = _build_node_type_items(_NODE_TYPE_CATEGORIES, _NODE_DISPLAY_NAMES_EN)
 
-    return items
+
+def get_node_type_items(self, context):
+    """获取节点类型列表用于下拉菜单"""
+    return _NODE_TYPE_ITEMS
 
 
 def _get_sorted_shader_node_groups():
@@ -519,28 +510,35 @@ def _get_sorted_shader_node_groups():
     return NodeGroupCache.get_sorted_shader_node_groups()
 
 
-def get_available_shaders(self, context):
-    """获取可用的着色器列表"""
-
-    def has_chinese(text):
-        """检测字符串是否包含中文或其他非 ASCII 字符"""
-        try:
-            text.encode('ascii')
-            return False
-        except UnicodeEncodeError:
-            return True
+# get_available_shaders 返回的 items 缓存：(排序后的节点组列表, items 元组)
+# 节点组列表由 NodeGroupCache 缓存，未变化时是同一个对象
+_shader_items_cache = (None, ())
 
-    shaders = []
+
+def get_available_shaders(self, context):
+    """获取可用的着色器列表（节点组未变化时返回同一个元组）"""
+    global _shader_items_cache
 
     # 添加节点组着色器(排序以确保顺序一致)
     shader_node_groups = _get_sorted_shader_node_groups()
 
+    cached_groups, cached_items = _shader_items_cache
+    if shader_node_groups is cached_groups:
+        return cached_items
+
+    if not shader_node_groups:
+        # 没有节点组时直接返回内置着色器元组本身
+        _shader_items_cache = (shader_node_groups, NodeTypeConfig.BUILTIN_SHADERS_FOR_MENU)
+        return NodeTypeConfig.BUILTIN_SHADERS_FOR_MENU
+
+    shaders = []
+
     for i, ng in enumerate(shader_node_groups):
         identifier = f"NODEGROUP_{i}"
         # Blender EnumProperty 的中文显示存在兼容性问题
         # 如枟包含非 ASCII 字符,在 name 中使用简化标识符
         # UI 层会额外显示完整的中文名称
-        if has_chinese(ng.name):
+        if not ng.name.isascii():
             display_name = f"NodeGroup_{i}"
             description = "Custom shader node group"
         else:
@@ -552,10 +550,9 @@ def get_available_shaders(self, context):
     # 添加内置着色器
     shaders.extend(NodeTypeConfig.BUILTIN_SHADERS_FOR_MENU)
 
-    if not shaders:
-        shaders.append(('NONE', '-- No Shaders Available --', ''))
-
-    return shaders
+    items = tuple(shaders)
+    _shader_items_cache = (shader_node_groups, items)
+    return items
 
 
 def get_available_shaders_for_specific(self, context):
@@ -570,44 +567,142 @@ def get_node_label_or_name(node):
     return node.name
 
 
+def _node_contains_lowered(node, target_name_lower):
+    """标签或名称（小写）是否包含目标字符串
+
+    精确匹配是包含匹配的特例，去掉首尾空白后相等时也必然包含，因此只需一次包含检查。
+    """
+    label = node.label
+    if label and target_name_lower in label.lower():
+        return True
+    return target_name_lower in node.name.lower()
+
+
 def match_node_by_label_or_name(node, target_name):
     """通过标签或名称匹配节点"""
     if not target_name:
         return False
+    return _node_contains_lowered(node, target_name.lower().strip())
+
+
+def match_nodes_by_label_or_name(nodes, target_name):
+    """批量通过标签或名称匹配节点（目标名称只处理一次）"""
+    if not target_name:
+        return []
     target_name_lower = target_name.lower().strip()
-    # 检查标签（精确匹配）
-    if node.label and node.label.lower().strip() == target_name_lower:
-        return True
-    # 检查名称（精确匹配）
-    if node.name.lower().strip() == target_name_lower:
-        return True
-    # 部分匹配（标签或名称包含目标字符串）
-    if node.label and target_name_lower in node.label.lower():
-        return True
-    if target_name_lower in node.name.lower():
-        return True
-    return False
+    return [node for node in nodes if _node_contains_lowered(node, target_name_lower)]
 
 
 def match_node_by_type(node, target_type):
-    """通过节点类型匹配节点"""
+    """通过节点类型匹配节点（节点组的 'GROUP' 也由直接比较覆盖）"""
     if not target_type:
         return False
     # 直接比较节点类型
-    if node.type == target_type:
+    node_type = node.type
+    if node_type == target_type:
         return True
 
-    # 检查是否是节点组
-    if target_type == 'GROUP' and node.type == 'GROUP':
-        return True
+    # 检查中文名称映射（同一中文名称可能对应多个类型）
+    return node_type in NODE_TYPE_NAMES_REVERSE.get(target_type, ())
 
-    # 检查中文名称映射
-    if target_type in NODE_TYPE_NAMES_REVERSE:
-        english_type = NODE_TYPE_NAMES_REVERSE[target_type]
-        if node.type == english_type:
-            return True
 
-    return False
+def get_material_output_node(node_tree):
+    """
+    获取材质输出节点
+
+    按节点顺序返回第一个材质输出节点，与 AutoConnectionRules 选择的输出节点一致。
+    不使用 get_output_node()：它返回活动输出且会修改各输出节点的活动标记。
+    """
+    for node in node_tree.nodes:
+        if node.type == 'OUTPUT_MATERIAL':
+            return node
+    return None
+
+
+def find_shader_output(shader_node):
+    """
+    查找着色器节点的 SHADER 类型输出接口
+
+    返回:
+        第一个 SHADER 类型输出，没有则返回第一个输出，都没有时返回 None
+    """
+    for out in shader_node.outputs:
+        if out.type == 'SHADER':
+            return out
+    if len(shader_node.outputs) > 0:
+        return shader_node.outputs[0]
+    return None
+
+
+# 图像纹理连接时查找输入接口的关键词，顺序即优先级
+IMAGE_COLOR_INPUT_KEYWORDS = (
+    'base color', 'basecolor',  # 最高优先级
+    'color', '颜色',             # 第二优先级（包含"颜色"的都在这里）
+    'diffuse', '漫反射',         # 第三优先级
+    'albedo', '反照率', '基础色',  # 第四优先级
+)
+IMAGE_ALPHA_INPUT_KEYWORDS = ('alpha', 'opacity', 'transparency', '透明')
+# Alpha 关键词不分优先级，编译为单个正则一次扫描
+IMAGE_ALPHA_INPUT_RE = _compile_keywords(IMAGE_ALPHA_INPUT_KEYWORDS)
+
+def find_input_by_keyword_priority(named_inputs, connected_inputs, keywords):
+    """
+    按关键词优先级查找未连接的输入接口
+
+    先比较命中的关键词优先级，优先级相同时取序号最小的接口。
+    每个接口名称只检查比当前最优更靠前的关键词，命中最高优先级即停止。
+
+    参数:
+        named_inputs: [(接口, 小写名称), ...]，按接口序号排列
+        connected_inputs: 已连接的输入集合
+        keywords: 按优先级排列的关键词
+    返回:
+        匹配的输入接口，或 None
+    """
+    best_input = None
+    best_rank = len(keywords)
+    for inp, inp_name_lower in named_inputs:
+        if inp in connected_inputs:
+            continue
+        for rank in range(best_rank):
+            if keywords[rank] in inp_name_lower:
+                best_input = inp
+                best_rank = rank
+                break
+        if best_rank == 0:
+            break
+    return best_input
+
+
+# 按节点名称推断语义的关键词表: (关键词, 语义)，顺序即优先级
+# 纹理节点（非图像纹理）
+_TEXTURE_NAME_SEMANTICS = (
+    ('normal', Sem.NORMAL), ('norm', Sem.NORMAL), ('法线', Sem.NORMAL),
+    ('rough', Sem.ROUGHNESS), ('gloss', Sem.ROUGHNESS),
+    ('粗糙', Sem.ROUGHNESS), ('光泽', Sem.ROUGHNESS),
+    ('metal', Sem.METALLIC), ('金属', Sem.METALLIC),
+    ('ao', Sem.AO), ('ambient', Sem.AO), ('遮蔽', Sem.AO),
+    ('emit', Sem.EMISSION), ('glow', Sem.EMISSION), ('发光', Sem.EMISSION),
+    ('alpha', Sem.ALPHA), ('opacity', Sem.ALPHA), ('透明', Sem.ALPHA),
+)
+
+# 其他节点（输出接口名称无法识别语义时使用）
+_OTHER_NODE_NAME_SEMANTICS = (
+    ('normal', Sem.NORMAL), ('norm', Sem.NORMAL), ('法线', Sem.NORMAL),
+    ('rough', Sem.ROUGHNESS), ('粗糙', Sem.ROUGHNESS),
+    ('metal', Sem.METALLIC), ('金属', Sem.METALLIC),
+    ('ao', Sem.AO), ('遮蔽', Sem.AO),
+    ('bump', Sem.NORMAL), ('凹凸', Sem.NORMAL),
+    ('alpha', Sem.ALPHA), ('透明', Sem.ALPHA),
+)
+
+
+def _classify_node_name(name_lower, keyword_semantics):
+    """按关键词表推断节点语义，第一个命中的关键词决定结果，都不命中时视为颜色"""
+    for keyword, semantic in keyword_semantics:
+        if keyword in name_lower:
+            return semantic
+    return Sem.COLOR
 
 
 class AutoConnectionRules:
@@ -630,326 +725,246 @@ class AutoConnectionRules:
 
         connect_count = 0
 
-        # 查找材质输出节点
+        # 一次遍历完成节点分类：材质输出、着色器、纹理和其他节点
         output_node = None
-        for node in nodes:
-            if node.type == 'OUTPUT_MATERIAL':
-                output_node = node
-                break
-
-        # 查找所有着色器节点
         shader_nodes = []
+        texture_nodes = []
+        other_nodes = []  # 非纹理、非着色器、非输出、非节点组
+        # 循环内用到的查找先绑定为局部变量
+        node_kind = _NODE_KINDS.get
+        is_shader_group = NodeTypeConfig.is_shader_node
         for node in nodes:
-            if node.type in NodeTypeConfig.SHADER_NODE_TYPES:
+            kind = node_kind(node.type, 0)
+            if kind & NODE_KIND_OUTPUT:
+                if output_node is None:
+                    output_node = node
+            elif kind & NODE_KIND_SHADER:
                 shader_nodes.append(node)
-            elif node.type == 'GROUP' and hasattr(node, 'node_tree') and node.node_tree:
-                if NodeTypeConfig.is_shader_node(node):
+            elif kind & NODE_KIND_GROUP:
+                if getattr(node, 'node_tree', None) and is_shader_group(node):
                     shader_nodes.append(node)
-
-        # 查找所有纹理节点
-        texture_nodes = []
-        for node in nodes:
-            if NodeTypeConfig.is_texture_node(node):
+            elif kind & NODE_KIND_TEXTURE:
                 texture_nodes.append(node)
+            else:
+                other_nodes.append(node)
 
         # 着色器到材质输出的连接
         if output_node and shader_nodes:
-            for shader_node in shader_nodes:
-                shader_output = None
-                for output in shader_node.outputs:
-                    if output.type == 'SHADER':
-                        shader_output = output
-                        break
-                if not shader_output and len(shader_node.outputs) > 0:
-                    shader_output = shader_node.outputs[0]
+            # 表面输入只取决于输出节点，在循环外查找一次
+            # 先建立名称索引（同名时保留第一个，与按名称取接口一致）
+            inputs_by_name = {}
+            for inp in output_node.inputs:
+                inputs_by_name.setdefault(inp.name, inp)
+
+            surface_input = None
+            surface_names = ['Surface', 'surface', '表面', '曲面', '表（曲）面']
+            for name in surface_names:
+                if name in inputs_by_name:
+                    surface_input = inputs_by_name[name]
+                    break
+            if not surface_input and len(output_node.inputs) > 0:
+                surface_input = output_node.inputs[0]
 
+            # 只连接第一个有输出的着色器（通常就是 shader_nodes[0]）
+            shader_output = None
+            for shader_node in shader_nodes:
+                shader_output = find_shader_output(shader_node)
                 if shader_output:
-                    surface_input = None
-                    surface_names = ['Surface', 'surface', '表面', '曲面', '表（曲）面']
-                    for name in surface_names:
-                        if name in output_node.inputs:
-                            surface_input = output_node.inputs[name]
-                            break
-                    if not surface_input and len(output_node.inputs) > 0:
-                        surface_input = output_node.inputs[0]
-
-                    if surface_input:
-                        try:
-                            links.new(shader_output, surface_input)
-                            connect_count += 1
-                        except:
-                            pass
                     break
 
+            if shader_output and surface_input:
+                if safe_link(links, shader_output, surface_input):
+                    connect_count += 1
+
         # 纹理到着色器的连接
         if shader_nodes and texture_nodes:
+            # 纹理的语义和颜色输出只取决于纹理节点本身，在着色器循环外计算一次
+            # 图像纹理的语义记为 None，按专门规则连接
+            texture_plan = []
+            for tex_node in texture_nodes:
+                if not tex_node.outputs:
+                    continue
+
+                if tex_node.type == 'TEX_IMAGE':
+                    texture_plan.append((tex_node, None, None))
+                    continue
+
+                # 其他纹理节点：使用语义匹配
+                tex_name = (
+                    tex_node.label if tex_node.label else tex_node.name).lower()
+
+                # 纹理语义识别
+                tex_semantic = _classify_node_name(tex_name, _TEXTURE_NAME_SEMANTICS)
+
+                # 找到颜色输出（RGBA 或 VECTOR 类型，且名称包含 color）
+                # 如果没找到明确的颜色输出，使用第一个 RGBA 或 VECTOR 输出
+                color_output = None
+                fallback_output = None
+                for out in tex_node.outputs:
+                    if out.type not in ('RGBA', 'VECTOR'):
+                        continue
+                    if fallback_output is None:
+                        fallback_output = out
+                    if 'color' in out.name.lower():
+                        color_output = out
+                        break
+                if not color_output:
+                    color_output = fallback_output
+
+                if color_output:
+                    texture_plan.append((tex_node, tex_semantic, color_output))
+
             for shader_node in shader_nodes:
                 connected_inputs = set()
 
-                # 检查着色器是否有 Alpha 输入
-                has_alpha_input = False
-                for inp in shader_node.inputs:
-                    if SocketSemantics.get_socket_semantic(inp.name) == 'ALPHA':
-                        has_alpha_input = True
-                        break
+                # 输入接口按语义分桶，后续匹配只查兼容的桶
+                input_buckets = SocketSemantics.bucket_sockets(shader_node.inputs)
+                # 输入接口的小写名称只计算一次
+                named_inputs = [
+                    (inp, inp.name.lower()) for inp in shader_node.inputs]
 
-                for tex_node in texture_nodes:
-                    if not tex_node.outputs:
-                        continue
+                # 检查着色器是否有 Alpha 输入
+                has_alpha_input = Sem.ALPHA in input_buckets
 
+                for tex_node, tex_semantic, color_output in texture_plan:
                     # 图像纹理特殊处理
-                    if tex_node.type == 'TEX_IMAGE':
+                    if tex_semantic is None:
                         # 连接 Color 输出
-                        if len(tex_node.outputs) > 0:
-                            color_output = tex_node.outputs[0]
-
-                            # 查找 Base Color 接口
-                            target_input = None
-                            color_keywords = [
-                                'base color', 'basecolor', 'color', '颜色', 'diffuse', '漫反射', 'albedo', '反照率', '基础色']
-
-                            for keyword in color_keywords:
-                                matching_inputs = []
-                                for idx, inp in enumerate(shader_node.inputs):
-                                    if inp in connected_inputs:
-                                        continue
-                                    if keyword in inp.name.lower():
-                                        matching_inputs.append((idx, inp))
-
-                                if matching_inputs:
-                                    matching_inputs.sort(key=lambda x: x[0])
-                                    target_input = matching_inputs[0][1]
-                                    break
-
-                            if target_input:
-                                try:
-                                    links.new(color_output, target_input)
-                                    connected_inputs.add(target_input)
-                                    connect_count += 1
-                                except:
-                                    pass
+                        color_output = tex_node.outputs[0]
+
+                        # 查找 Base Color 接口（按关键词优先级，取序号最小的）
+                        target_input = find_input_by_keyword_priority(
+                            named_inputs, connected_inputs, IMAGE_COLOR_INPUT_KEYWORDS)
+
+                        if target_input:
+                            if safe_link(links, color_output, target_input):
+                                connected_inputs.add(target_input)
+                                connect_count += 1
 
                         # 连接 Alpha 输出（仅当着色器有 Alpha 输入时）
                         if has_alpha_input and len(tex_node.outputs) > 1:
                             alpha_output = tex_node.outputs[1]
 
                             # 查找 Alpha 接口
-                            alpha_input = None
-                            alpha_keywords = [
-                                'alpha', 'opacity', 'transparency', '透明']
-
-                            matching_inputs = []
-                            for idx, inp in enumerate(shader_node.inputs):
-                                if inp in connected_inputs:
-                                    continue
-                                inp_name_lower = inp.name.lower()
-                                if any(kw in inp_name_lower for kw in alpha_keywords):
-                                    matching_inputs.append((idx, inp))
-
-                            if matching_inputs:
-                                matching_inputs.sort(key=lambda x: x[0])
-                                alpha_input = matching_inputs[0][1]
+                            alpha_input = next(
+                                (inp for inp, inp_name_lower in named_inputs
+                                 if inp not in connected_inputs
+                                 and IMAGE_ALPHA_INPUT_RE.search(inp_name_lower)),
+                                None)
 
                             if alpha_input:
-                                try:
-                                    links.new(alpha_output, alpha_input)
+                                if safe_link(links, alpha_output, alpha_input):
                                     connected_inputs.add(alpha_input)
                                     connect_count += 1
-                                except:
-                                    pass
 
                     else:
-                        # 其他纹理节点：使用语义匹配
-                        tex_name = (
-                            tex_node.label if tex_node.label else tex_node.name).lower()
-
-                        # 纹理语义识别
-                        tex_semantic = 'COLOR'
-                        if any(kw in tex_name for kw in ['normal', 'norm', '法线']):
-                            tex_semantic = 'NORMAL'
-                        elif any(kw in tex_name for kw in ['rough', 'gloss', '粗糙', '光泽']):
-                            tex_semantic = 'ROUGHNESS'
-                        elif any(kw in tex_name for kw in ['metal', '金属']):
-                            tex_semantic = 'METALLIC'
-                        elif any(kw in tex_name for kw in ['ao', 'ambient', '遮蔽']):
-                            tex_semantic = 'AO'
-                        elif any(kw in tex_name for kw in ['emit', 'glow', '发光']):
-                            tex_semantic = 'EMISSION'
-                        elif any(kw in tex_name for kw in ['alpha', 'opacity', '透明']):
-                            tex_semantic = 'ALPHA'
-
-                        # 找到颜色输出（RGBA 或 VECTOR 类型，且名称包含 color）
-                        color_output = None
-                        for out in tex_node.outputs:
-                            if out.type in ['RGBA', 'VECTOR'] and 'color' in out.name.lower():
-                                color_output = out
-                                break
-
-                        # 如果没找到明确的颜色输出，使用第一个 RGBA 或 VECTOR 输出
-                        if not color_output:
-                            for out in tex_node.outputs:
-                                if out.type in ['RGBA', 'VECTOR']:
-                                    color_output = out
-                                    break
-
-                        if not color_output:
-                            continue
-
                         # 找到最佳输入接口
-                        best_input = None
-                        best_score = 0
-
-                        for inp in shader_node.inputs:
-                            if inp in connected_inputs:
-                                continue
-
-                            input_semantic = SocketSemantics.get_socket_semantic(
-                                inp.name)
-                            score = SocketSemantics.are_semantically_compatible(
-                                tex_semantic, input_semantic)
-
-                            if score > best_score:
-                                best_score = score
-                                best_input = inp
+                        best_input, best_score = SocketSemantics.find_compatible_input(
+                            tex_semantic, input_buckets, connected_inputs, min_score=50)
 
                         # 连接颜色输出
-                        if best_input and best_score >= 50:
-                            try:
-                                links.new(color_output, best_input)
+                        if best_input:
+                            if safe_link(links, color_output, best_input):
                                 connected_inputs.add(best_input)
                                 connect_count += 1
-                            except:
-                                pass
-        # return connect_count
 
         # ========== 其他类型节点到着色器的连接 ==========
-        # 查找所有非纹理、非着色器的节点
-        other_nodes = []
-        for node in nodes:
-            if (node.type not in NodeTypeConfig.TEXTURE_NODE_TYPES and
-                node.type not in NodeTypeConfig.SHADER_NODE_TYPES and
-                node.type != 'OUTPUT_MATERIAL' and
-                    node.type != 'GROUP'):
-                other_nodes.append(node)
-
+        # other_nodes 已在开头的分类中收集
         if shader_nodes and other_nodes:
+            # 每个节点可用输出的语义与着色器无关，预先计算一次: [[(输出, 语义), ...], ...]
+            other_outputs = []
+            for other_node in other_nodes:
+                if not other_node.outputs:
+                    continue
+
+                node_name = (
+                    other_node.label if other_node.label else other_node.name).lower()
+
+                outputs = []
+                for out in other_node.outputs:
+                    if out.type not in ('RGBA', 'VECTOR', 'VALUE'):
+                        continue
+
+                    output_semantic = SocketSemantics.get_socket_semantic(
+                        out.name)
+                    if output_semantic == Sem.UNKNOWN:
+                        output_semantic = _classify_node_name(
+                            node_name, _OTHER_NODE_NAME_SEMANTICS)
+                    outputs.append((out, output_semantic))
+
+                if outputs:
+                    other_outputs.append(outputs)
+
             for shader_node in shader_nodes:
                 connected_inputs = set()  # 新的 connected_inputs，不与纹理共享
+                input_buckets = SocketSemantics.bucket_sockets(shader_node.inputs)
 
-                for other_node in other_nodes:
-                    if not other_node.outputs:
-                        continue
+                for outputs in other_outputs:
+                    for out, output_semantic in outputs:
+                        best_input, best_score = SocketSemantics.find_compatible_input(
+                            output_semantic, input_buckets, connected_inputs, min_score=40)
 
-                    node_name = (
-                        other_node.label if other_node.label else other_node.name).lower()
-
-                    for out in other_node.outputs:
-                        if out.type not in ['RGBA', 'VECTOR', 'VALUE']:
-                            continue
-
-                        output_semantic = SocketSemantics.get_socket_semantic(
-                            out.name)
-                        if output_semantic == 'UNKNOWN':
-                            if any(kw in node_name for kw in ['normal', 'norm', '法线']):
-                                output_semantic = 'NORMAL'
-                            elif any(kw in node_name for kw in ['rough', '粗糙']):
-                                output_semantic = 'ROUGHNESS'
-                            elif any(kw in node_name for kw in ['metal', '金属']):
-                                output_semantic = 'METALLIC'
-                            elif any(kw in node_name for kw in ['ao', '遮蔽']):
-                                output_semantic = 'AO'
-                            elif any(kw in node_name for kw in ['bump', '凹凸']):
-                                output_semantic = 'NORMAL'
-                            elif any(kw in node_name for kw in ['alpha', '透明']):
-                                output_semantic = 'ALPHA'
-                            else:
-                                output_semantic = 'COLOR'
-
-                        best_input = None
-                        best_score = 0
-
-                        for inp in shader_node.inputs:
-                            if inp in connected_inputs:
-                                continue
-
-                            input_semantic = SocketSemantics.get_socket_semantic(
-                                inp.name)
-                            score = SocketSemantics.are_semantically_compatible(
-                                output_semantic, input_semantic)
-
-                            if score > best_score:
-                                best_score = score
-                                best_input = inp
-
-                        if best_input and best_score >= 40:
-                            try:
-                                links.new(out, best_input)
+                        if best_input:
+                            if safe_link(links, out, best_input):
                                 connected_inputs.add(best_input)
                                 connect_count += 1
                                 break
-                            except:
-                                pass
         return connect_count
 
 
-def get_all_node_types(self, context):
-    """获取所有节点类型用于下拉菜单"""
-    items = [('', '-- Select Node Type --', '')]
+# 所有节点类型（按类别分组，显示中文名称）
+_ALL_NODE_TYPE_CATEGORIES = {
+    'Shader': [
+        'BSDF_PRINCIPLED', 'BSDF_DIFFUSE', 'BSDF_GLOSSY', 'BSDF_TRANSPARENT',
+        'BSDF_GLASS', 'EMISSION', 'SUBSURFACE_SCATTERING', 'MIX_SHADER', 'ADD_SHADER',
+        'BSDF_TRANSLUCENT', 'BSDF_REFRACTION', 'BSDF_TOON', 'BSDF_SHEEN', 'BSDF_ANISOTROPIC',
+        'BSDF_HAIR', 'BSDF_HAIR_PRINCIPLED', 'VOLUME_ABSORPTION', 'VOLUME_SCATTER',
+        'VOLUME_PRINCIPLED', 'HOLDOUT', 'BACKGROUND', 'EEVEE_SPECULAR'
+    ],
+    'Texture': [
+        'TEX_IMAGE', 'TEX_ENVIRONMENT', 'TEX_SKY', 'TEX_NOISE', 'TEX_VORONOI',
+        'TEX_WAVE', 'TEX_MAGIC', 'TEX_CHECKER', 'TEX_BRICK', 'TEX_GRADIENT',
+        'TEX_WHITE_NOISE', 'TEX_GABOR', 'TEX_MUSGRAVE', 'TEX_POINTDENSITY', 'TEX_IES'
+    ],
+    'Color': [
+        'MIX', 'MIX_RGB', 'CURVE_RGB', 'CURVE_VEC', 'INVERT', 'HUE_SAT',
+        'GAMMA', 'BRIGHTCONTRAST', 'LIGHT_FALLOFF', 'VALTORGB', 'RGBTOBW'
+    ],
+    'Vector': [
+        'BUMP', 'NORMAL', 'NORMAL_MAP', 'DISPLACEMENT', 'VECTOR_DISPLACEMENT',
+        'MAPPING', 'VECT_TRANSFORM', 'VECTOR_ROTATE', 'VECTOR_MATH'
+    ],
+    'Converter': [
+        'SEPARATE_COLOR', 'COMBINE_COLOR', 'SEPRGB', 'COMBRGB', 'SEPXYZ',
+        'COMBXYZ', 'SEPHSV', 'COMBHSV', 'WAVELENGTH', 'BLACKBODY'
+    ],
+    'Input': [
+        'TEX_COORD', 'UVMAP', 'GEOMETRY', 'OBJECT_INFO', 'PARTICLE_INFO',
+        'HAIR_INFO', 'POINT_INFO', 'VOLUME_INFO', 'ATTRIBUTE', 'TANGENT',
+        'LAYER_WEIGHT', 'FRESNEL', 'AMBIENT_OCCLUSION', 'BEVEL', 'WIREFRAME',
+        'VALUE', 'RGB', 'VERTEX_COLOR', 'CAMERA', 'LIGHT_PATH'
+    ],
+    'Output': [
+        'OUTPUT_MATERIAL', 'OUTPUT_WORLD', 'OUTPUT_LIGHT', 'OUTPUT_AOV'
+    ],
+    'Math': [
+        'MATH', 'CLAMP', 'MAP_RANGE'
+    ],
+    'Layout': [
+        'FRAME', 'REROUTE', 'GROUP', 'GROUP_INPUT', 'GROUP_OUTPUT'
+    ],
+    'Script': [
+        'SCRIPT'
+    ]
+}
 
-    # 按类别分组
-    categories = {
-        'Shader': [
-            'BSDF_PRINCIPLED', 'BSDF_DIFFUSE', 'BSDF_GLOSSY', 'BSDF_TRANSPARENT',
-            'BSDF_GLASS', 'EMISSION', 'SUBSURFACE_SCATTERING', 'MIX_SHADER', 'ADD_SHADER',
-            'BSDF_TRANSLUCENT', 'BSDF_REFRACTION', 'BSDF_TOON', 'BSDF_SHEEN', 'BSDF_ANISOTROPIC',
-            'BSDF_HAIR', 'BSDF_HAIR_PRINCIPLED', 'VOLUME_ABSORPTION', 'VOLUME_SCATTER',
-            'VOLUME_PRINCIPLED', 'HOLDOUT', 'BACKGROUND', 'EEVEE_SPECULAR'
-        ],
-        'Texture': [
-            'TEX_IMAGE', 'TEX_ENVIRONMENT', 'TEX_SKY', 'TEX_NOISE', 'TEX_VORONOI',
-            'TEX_WAVE', 'TEX_MAGIC', 'TEX_CHECKER', 'TEX_BRICK', 'TEX_GRADIENT',
-            'TEX_WHITE_NOISE', 'TEX_GABOR', 'TEX_MUSGRAVE', 'TEX_POINTDENSITY', 'TEX_IES'
-        ],
-        'Color': [
-            'MIX', 'MIX_RGB', 'CURVE_RGB', 'CURVE_VEC', 'INVERT', 'HUE_SAT',
-            'GAMMA', 'BRIGHTCONTRAST', 'LIGHT_FALLOFF', 'VALTORGB', 'RGBTOBW'
-        ],
-        'Vector': [
-            'BUMP', 'NORMAL', 'NORMAL_MAP', 'DISPLACEMENT', 'VECTOR_DISPLACEMENT',
-            'MAPPING', 'VECT_TRANSFORM', 'VECTOR_ROTATE', 'VECTOR_MATH'
-        ],
-        'Converter': [
-            'SEPARATE_COLOR', 'COMBINE_COLOR', 'SEPRGB', 'COMBRGB', 'SEPXYZ',
-            'COMBXYZ', 'SEPHSV', 'COMBHSV', 'WAVELENGTH', 'BLACKBODY'
-        ],
-        'Input': [
-            'TEX_COORD', 'UVMAP', 'GEOMETRY', 'OBJECT_INFO', 'PARTICLE_INFO',
-            'HAIR_INFO', 'POINT_INFO', 'VOLUME_INFO', 'ATTRIBUTE', 'TANGENT',
-            'LAYER_WEIGHT', 'FRESNEL', 'AMBIENT_OCCLUSION', 'BEVEL', 'WIREFRAME',
-            'VALUE', 'RGB', 'VERTEX_COLOR', 'CAMERA', 'LIGHT_PATH'
-        ],
-        'Output': [
-            'OUTPUT_MATERIAL', 'OUTPUT_WORLD', 'OUTPUT_LIGHT', 'OUTPUT_AOV'
-        ],
-        'Math': [
-            'MATH', 'CLAMP', 'MAP_RANGE'
-        ],
-        'Layout': [
-            'FRAME', 'REROUTE', 'GROUP', 'GROUP_INPUT', 'GROUP_OUTPUT'
-        ],
-        'Script': [
-            'SCRIPT'
-        ]
-    }
+# 节点类型是固定的，items 只在导入时构建一次（元组同时保证字符串一直被引用）
+_ALL_NODE_TYPE_ITEMS = _build_node_type_items(_ALL_NODE_TYPE_CATEGORIES, NODE_TYPE_NAMES)
 
-    for category, types in categories.items():
-        # 添加分隔符
-        items.append((f'__{category}__', f'-- {category} --', ''))
-        for node_type in types:
-            display_name = NODE_TYPE_NAMES.get(node_type, node_type)
-            items.append((node_type, display_name, f'Node type: {node_type}'))
 
-    return items
+def get_all_node_types(self, context):
+    """获取所有节点类型用于下拉菜单"""
+    return _ALL_NODE_TYPE_ITEMS
 
 
 def register():
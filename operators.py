@@ -3,21 +3,142 @@
 定义插件的所有操作符
 """
 
+from collections import defaultdict
+
 import bpy
 from bpy.types import Operator
 from .node_config import (
     NodeTypeConfig,
     SocketSemantics,
+    IMAGE_COLOR_INPUT_KEYWORDS,
+    IMAGE_ALPHA_INPUT_RE,
     AutoConnectionRules,
     get_node_label_or_name,
-    match_node_by_label_or_name,
+    match_nodes_by_label_or_name,
     match_node_by_type,
+    find_input_by_keyword_priority,
+    find_shader_output,
+    get_material_output_node,
     _get_sorted_shader_node_groups
 )
-from .cache import MaterialCache
+from .semantics import _semantic_of
+from .cache import (
+    clear_material_cache,
+    is_material_processed,
+    mark_material_processed,
+    get_material_result
+)
 from .error_handler import safe_link, safe_remove_node
 
 
+def _get_target_shader_types(props, replace_mode):
+    """根据替换模式获取断开/重连涉及的着色器类型列表（节点组以 'GROUP:' 前缀表示）"""
+    if replace_mode == 'SPECIFIC':
+        builtin_shader = props.specific_builtin_shader
+        nodegroup = props.specific_nodegroup
+    elif replace_mode == 'MATERIAL_SPECIFIC':
+        builtin_shader = props.material_specific_builtin_shader
+        nodegroup = props.material_specific_nodegroup
+    elif replace_mode == 'MATERIAL':
+        return ['ALL'] if props.target_material else []
+    else:
+        return ['ALL']
+
+    shader_types = []
+    if builtin_shader and builtin_shader != 'NONE':
+        shader_types.append(builtin_shader)
+    if nodegroup:
+        nodegroup_name = nodegroup.name
+        if nodegroup_name:
+            shader_types.append(f"GROUP:{nodegroup_name}")
+    return shader_types
+
+
+def _get_surface_input(output_node):
+    """获取材质输出节点的 Surface 接口，没有时返回第一个输入接口"""
+    inputs = output_node.inputs
+    surface_input = inputs.get('Surface')
+    if surface_input is None and len(inputs) > 0:
+        surface_input = inputs[0]
+    return surface_input
+
+
+def _iter_slot_materials(objects):
+    """按物体、材质槽的顺序遍历网格物体上启用节点的材质（共用的材质会重复出现）"""
+    for obj in objects:
+        if obj.type == 'MESH':
+            for slot in obj.material_slots:
+                mat = slot.material
+                if mat and mat.use_nodes:
+                    yield mat
+
+
+def _iter_node_materials(selected_objects, replace_mode, target_material):
+    """
+    遍历需要处理的启用节点的材质
+
+    特定材质模式下只处理目标材质（且仅当它被某个选中的网格物体使用时），
+    不再逐个材质槽比较名称；其他模式按物体、材质槽的顺序返回，
+    多个物体/材质槽共用的材质只返回一次（按数据块指针去重，不读取名称）。
+    """
+    if replace_mode in ('MATERIAL', 'MATERIAL_SPECIFIC') and target_material:
+        if not target_material.use_nodes:
+            return
+        for obj in selected_objects:
+            if obj.type == 'MESH':
+                for slot in obj.material_slots:
+                    if slot.material == target_material:
+                        yield target_material
+                        return
+        return
+
+    seen = set()
+    for mat in _iter_slot_materials(selected_objects):
+        pointer = mat.as_pointer()
+        if pointer not in seen:
+            seen.add(pointer)
+            yield mat
+
+
+# 接口类型兼容性矩阵（相同类型为 100，由调用方直接处理）
+_SOCKET_TYPE_INDEX = {'RGBA': 0, 'VECTOR': 1, 'VALUE': 2, 'SHADER': 3}
+_SOCKET_TYPE_COUNT = len(_SOCKET_TYPE_INDEX)
+_SOCKET_TYPE_CROSS_COMPATIBILITY = {
+    ('RGBA', 'VECTOR'): 80,
+    ('RGBA', 'VALUE'): 60,
+    ('VECTOR', 'RGBA'): 80,
+    ('VALUE', 'RGBA'): 60,
+}
+
+
+def _build_socket_type_compat_table():
+    """构建扁平的接口类型兼容性表，按 output * _SOCKET_TYPE_COUNT + input 索引"""
+    table = bytearray(_SOCKET_TYPE_COUNT * _SOCKET_TYPE_COUNT)
+    for index in _SOCKET_TYPE_INDEX.values():
+        table[index * _SOCKET_TYPE_COUNT + index] = 100
+    for (output_type, input_type), score in _SOCKET_TYPE_CROSS_COMPATIBILITY.items():
+        table[_SOCKET_TYPE_INDEX[output_type] * _SOCKET_TYPE_COUNT + _SOCKET_TYPE_INDEX[input_type]] = score
+    return bytes(table)
+
+
+_SOCKET_TYPE_COMPAT = _build_socket_type_compat_table()
+
+# 连接快照条目的字符串字段，顺序与 _record_connection 返回的字符串元组一致
+_SNAPSHOT_STRING_FIELDS = (
+    'material_name',
+    'from_node_name',
+    'from_node_type',
+    'from_socket_name',
+    'from_socket_type',
+    'to_node_name',
+    'to_node_type',
+    'to_socket_name',
+    'to_socket_type',
+    'replace_mode',
+    'shader_type',
+)
+
+
 class MATERIAL_OT_add_connection_rule(Operator):
     """添加连接规则"""
 
@@ -62,8 +183,7 @@ class MATERIAL_OT_clear_connection_snapshot(Operator):
         scene = context.scene
         props = scene.shader_replacer_props
 
-        while len(props.connection_snapshot) > 0:
-            props.connection_snapshot.remove(0)
+        props.connection_snapshot.clear()
 
         self.report({'INFO'}, "已清空连接快照")
         return {'FINISHED'}
@@ -76,42 +196,36 @@ class MATERIAL_OT_disconnect_all_connections(Operator):
     bl_label = "断开所有连接"
     bl_description = "断开选中物体全部材质全部节点之间的连接"
 
-    def get_disconnect_button_label(self, replace_mode):
-        """根据替换模式获取按钮显示文本"""
-        button_labels = {
-            'ALL': "断开所有连接",
-            'SPECIFIC': "断开特定连接",
-            'MATERIAL': "断开特定材质连接",
-            'MATERIAL_SPECIFIC': "断开特定材质中的特定连接"
-        }
-        return button_labels.get(replace_mode, "断开所有连接")
-
-    def get_shader_types_to_disconnect(self, props):
-        """根据替换模式获取需要断开连接的着色器类型列表"""
-        shader_types = []
-
-        if props.replace_mode == 'SPECIFIC':
-            if props.specific_builtin_shader and props.specific_builtin_shader != 'NONE':
-                shader_types.append(props.specific_builtin_shader)
-            if props.specific_nodegroup and props.specific_nodegroup.name:
-                shader_types.append(f"GROUP:{props.specific_nodegroup.name}")
-        elif props.replace_mode == 'MATERIAL_SPECIFIC':
-            if props.material_specific_builtin_shader and props.material_specific_builtin_shader != 'NONE':
-                shader_types.append(props.material_specific_builtin_shader)
-            if props.material_specific_nodegroup and props.material_specific_nodegroup.name:
-                shader_types.append(f"GROUP:{props.material_specific_nodegroup.name}")
-        elif props.replace_mode == 'MATERIAL':
-            if props.target_material:
-                shader_types = ['ALL']
-            else:
-                shader_types = []
-        else:
-            shader_types = ['ALL']
+    @staticmethod
+    def _socket_index(node, socket, is_output, index_cache):
+        """
+        查找接口在节点输入/输出列表中的序号
 
-        return shader_types
+        每个节点的 指针 -> 序号 映射只构建一次并保存在 index_cache 中；
+        按指针找不到时（接口已被替换）再按名称查找，都找不到返回 0。
+        """
+        sockets = node.outputs if is_output else node.inputs
+        key = (node.as_pointer(), is_output)
+        indices = index_cache.get(key)
+        if indices is None:
+            indices = {sock.as_pointer(): i for i, sock in enumerate(sockets)}
+            index_cache[key] = indices
+
+        index = indices.get(socket.as_pointer())
+        if index is not None:
+            return index
+        for i, sock in enumerate(sockets):
+            if sock.name == socket.name:
+                return i
+        return 0
+
+    def _record_connection(self, link, material_name, replace_mode, shader_type, index_cache):
+        """
+        生成单个连接的快照记录（index_cache 在同一材质的连接间共享）
 
-    def _record_connection(self, snapshot_collection, link, material_name, replace_mode, shader_type):
-        """将单个连接记录到快照集合中"""
+        返回:
+            (字符串字段元组，顺序同 _SNAPSHOT_STRING_FIELDS, 源接口索引, 目标接口索引)
+        """
         from_node = link.from_node
         to_node = link.to_node
         from_socket = link.from_socket
@@ -119,37 +233,71 @@ class MATERIAL_OT_disconnect_all_connections(Operator):
 
         from_socket_index = 0
         if from_node and from_socket:
-            for i, output in enumerate(from_node.outputs):
-                if output == from_socket or output.name == from_socket.name:
-                    from_socket_index = i
-                    break
+            from_socket_index = self._socket_index(from_node, from_socket, True, index_cache)
 
         to_socket_index = 0
         if to_node and to_socket:
-            for i, input_socket in enumerate(to_node.inputs):
-                if input_socket == to_socket or input_socket.name == to_socket.name:
-                    to_socket_index = i
-                    break
-
-        item = snapshot_collection.add()
-        item.material_name = material_name
-        item.from_node_name = from_node.name if from_node else ""
-        item.from_node_type = from_node.type if from_node else ""
-        item.from_socket_name = from_socket.name if from_socket else ""
-        item.from_socket_index = from_socket_index
-        item.from_socket_type = from_socket.bl_idname if from_socket else ""
-        item.to_node_name = to_node.name if to_node else ""
-        item.to_node_type = to_node.type if to_node else ""
-        item.to_socket_name = to_socket.name if to_socket else ""
-        item.to_socket_index = to_socket_index
-        item.to_socket_type = to_socket.bl_idname if to_socket else ""
-        item.replace_mode = replace_mode
-        item.shader_type = shader_type
+            to_socket_index = self._socket_index(to_node, to_socket, False, index_cache)
+
+        strings = (
+            material_name,
+            from_node.name if from_node else "",
+            from_node.type if from_node else "",
+            from_socket.name if from_socket else "",
+            from_socket.bl_idname if from_socket else "",
+            to_node.name if to_node else "",
+            to_node.type if to_node else "",
+            to_socket.name if to_socket else "",
+            to_socket.bl_idname if to_socket else "",
+            replace_mode,
+            shader_type,
+        )
+        return strings, from_socket_index, to_socket_index
+
+    @staticmethod
+    def _write_snapshot(snapshot_collection, records):
+        """
+        批量写入快照记录
+
+        先一次性添加全部条目，整数字段通过 foreach_get/foreach_set 整列写入，
+        字符串字段（foreach_set 不支持）再逐项赋值。
+        """
+        if not records:
+            return
+
+        start = len(snapshot_collection)
+        for _ in records:
+            snapshot_collection.add()
+        total = start + len(records)
+
+        for field, column in (('from_socket_index', 1), ('to_socket_index', 2)):
+            values = [0] * total
+            if start:
+                snapshot_collection.foreach_get(field, values)
+            values[start:] = [record[column] for record in records]
+            snapshot_collection.foreach_set(field, values)
+
+        for offset, record in enumerate(records):
+            item = snapshot_collection[start + offset]
+            for field, value in zip(_SNAPSHOT_STRING_FIELDS, record[0]):
+                setattr(item, field, value)
+
+    @staticmethod
+    def _node_matches(node, builtin_types, group_names):
+        """节点是否属于需要断开连接的着色器类型（内置类型或指定节点组）"""
+        if not node:
+            return False
+        node_type = node.type
+        if node_type in builtin_types:
+            return True
+        if node_type == 'GROUP' and group_names:
+            node_tree = node.node_tree
+            return bool(node_tree and node_tree.name in group_names)
+        return False
 
     def _clear_snapshot(self, props):
         """清空连接快照"""
-        while len(props.connection_snapshot) > 0:
-            props.connection_snapshot.remove(0)
+        props.connection_snapshot.clear()
 
     def execute(self, context):
         selected_objects = context.selected_objects
@@ -160,90 +308,84 @@ class MATERIAL_OT_disconnect_all_connections(Operator):
         scene = context.scene
         props = scene.shader_replacer_props
 
-        shader_types = self.get_shader_types_to_disconnect(props)
+        # 属性只读取一次，循环中使用局部变量
+        replace_mode = props.replace_mode
+        target_material = props.target_material
+        enable_recording = props.enable_connection_recording
+
+        shader_types = _get_target_shader_types(props, replace_mode)
 
-        if props.replace_mode == 'MATERIAL' and not props.target_material:
+        if replace_mode == 'MATERIAL' and not target_material:
             self.report({'WARNING'}, "请先选择目标材质")
             return {'CANCELLED'}
 
+        # 着色器类型只解析一次：内置类型与节点组名称分别放入集合
+        builtin_types = frozenset(t for t in shader_types if not t.startswith('GROUP:'))
+        group_names = frozenset(t[6:] for t in shader_types if t.startswith('GROUP:'))
+
         disconnected_count = 0
 
         # 只有在启用连接关系记录时才清空快照
-        if props.enable_connection_recording:
+        if enable_recording:
             self._clear_snapshot(props)
 
-        for obj in selected_objects:
-            if obj.type == 'MESH':
-                for slot in obj.material_slots:
-                    if slot.material and slot.material.use_nodes:
-                        mat = slot.material
-                        node_tree = mat.node_tree
-                        links = node_tree.links
-                        nodes = node_tree.nodes
+        remove_all = 'ALL' in shader_types
+        shader_type_str = ','.join(shader_types) if shader_types else 'ALL'
+        snapshot_records = []
 
-                        should_process = True
+        for mat in _iter_node_materials(selected_objects, replace_mode, target_material):
+            node_tree = mat.node_tree
+            links = node_tree.links
 
-                        if props.replace_mode in ('MATERIAL', 'MATERIAL_SPECIFIC'):
-                            if props.target_material:
-                                should_process = (mat.name == props.target_material.name)
+            # 需要记录并断开的连接（全部断开且不记录时无需收集）
+            links_to_process = []
 
-                        if not should_process:
-                            continue
+            if remove_all:
+                if enable_recording:
+                    links_to_process = list(links)
+            else:
+                # 每个节点只判断一次，记录匹配节点的指针；没有匹配节点时无需遍历连接
+                matched_nodes = {
+                    node.as_pointer() for node in node_tree.nodes
+                    if self._node_matches(node, builtin_types, group_names)
+                }
+                if matched_nodes:
+                    for link in links:
+                        from_node = link.from_node
+                        to_node = link.to_node
+                        if ((from_node and from_node.as_pointer() in matched_nodes)
+                                or (to_node and to_node.as_pointer() in matched_nodes)):
+                            links_to_process.append(link)
+
+            # 只有在启用连接关系记录时才记录连接（先收集，最后统一写入快照）
+            if enable_recording:
+                index_cache = {}
+                mat_name = mat.name
+                for link in links_to_process:
+                    snapshot_records.append(self._record_connection(
+                        link,
+                        mat_name,
+                        replace_mode,
+                        shader_type_str,
+                        index_cache
+                    ))
+
+            if remove_all:
+                # 快照已记录完毕，一次性清空整棵节点树的连接
+                disconnected_count += len(links)
+                links.clear()
+            else:
+                for link in links_to_process:
+                    links.remove(link)
+                disconnected_count += len(links_to_process)
+
+        self._write_snapshot(props.connection_snapshot, snapshot_records)
 
-                        links_to_remove = []
-                        links_to_record = []
-
-                        if 'ALL' in shader_types:
-                            links_to_remove = list(links)
-                            links_to_record = list(links)
-                        else:
-                            for link in links:
-                                from_node = link.from_node
-                                to_node = link.to_node
-
-                                should_remove = False
-
-                                for shader_type in shader_types:
-                                    if shader_type.startswith('GROUP:'):
-                                        group_name = shader_type[6:]
-                                        if from_node and from_node.type == 'GROUP':
-                                            if from_node.node_tree and from_node.node_tree.name == group_name:
-                                                should_remove = True
-                                        if to_node and to_node.type == 'GROUP':
-                                            if to_node.node_tree and to_node.node_tree.name == group_name:
-                                                should_remove = True
-                                    else:
-                                        if from_node and from_node.type == shader_type:
-                                            should_remove = True
-                                        if to_node and to_node.type == shader_type:
-                                            should_remove = True
-
-                                if should_remove:
-                                    links_to_remove.append(link)
-                                    links_to_record.append(link)
-
-                        shader_type_str = ','.join(shader_types) if shader_types else 'ALL'
-
-                        # 只有在启用连接关系记录时才记录连接
-                        if props.enable_connection_recording:
-                            for link in links_to_record:
-                                self._record_connection(
-                                    props.connection_snapshot,
-                                    link,
-                                    mat.name,
-                                    props.replace_mode,
-                                    shader_type_str
-                                )
-
-                        for link in links_to_remove:
-                            links.remove(link)
-                            disconnected_count += 1
-
-        if props.replace_mode == 'ALL':
+        if replace_mode == 'ALL':
             report_msg = f"已断开 {disconnected_count} 个连接（已记录连接关系）"
-        elif props.replace_mode == 'SPECIFIC':
+        elif replace_mode == 'SPECIFIC':
             report_msg = f"已断开特定着色器的 {disconnected_count} 个连接（已记录连接关系）"
-        elif props.replace_mode == 'MATERIAL':
+        elif replace_mode == 'MATERIAL':
             report_msg = f"已断开目标材质的 {disconnected_count} 个连接（已记录连接关系）"
         else:
             report_msg = f"已断开特定材质中特定着色器的 {disconnected_count} 个连接（已记录连接关系）"
@@ -258,38 +400,46 @@ class MATERIAL_OT_reconnect_with_rules(Operator):
     bl_label = "使用规则重新连接"
     bl_description = "根据自动连接开关状态决定连接方式：开启时先自动连接再应用自定义规则，关闭时只应用自定义规则"
 
-    def get_shader_types_to_reconnect(self, props):
-        """根据替换模式获取需要重连的着色器类型列表"""
-        shader_types = []
+    @staticmethod
+    def _rule_match_key(match_mode, node_label, node_type):
+        """
+        获取规则一端的匹配键 (匹配方式, 标签/类型)
 
-        if props.replace_mode == 'SPECIFIC':
-            if props.specific_builtin_shader and props.specific_builtin_shader != 'NONE':
-                shader_types.append(props.specific_builtin_shader)
-            if props.specific_nodegroup and props.specific_nodegroup.name:
-                shader_types.append(f"GROUP:{props.specific_nodegroup.name}")
-        elif props.replace_mode == 'MATERIAL_SPECIFIC':
-            if props.material_specific_builtin_shader and props.material_specific_builtin_shader != 'NONE':
-                shader_types.append(props.material_specific_builtin_shader)
-            if props.material_specific_nodegroup and props.material_specific_nodegroup.name:
-                shader_types.append(f"GROUP:{props.material_specific_nodegroup.name}")
-        elif props.replace_mode == 'MATERIAL':
-            if props.target_material:
-                shader_types = ['ALL']
+        标签为空、类型为空或为占位项（'__' 开头）时返回 None，表示不会匹配任何节点。
+        """
+        if match_mode == 'LABEL':
+            return ('LABEL', node_label) if node_label else None
+        if not node_type or node_type.startswith('__'):
+            return None
+        return ('TYPE', node_type)
+
+    @staticmethod
+    def _match_rule_nodes(nodes, match_key, match_cache):
+        """按匹配键查找节点，结果缓存在 match_cache 中"""
+        matched = match_cache.get(match_key)
+        if matched is None:
+            match_mode, value = match_key
+            if match_mode == 'LABEL':
+                matched = match_nodes_by_label_or_name(nodes, value)
             else:
-                shader_types = []
-        else:
-            shader_types = ['ALL']
-
-        return shader_types
-
-    def _restore_connections_from_snapshot(self, props, node_tree, material_name):
-        """从快照中恢复指定材质的连接关系"""
+                matched = [n for n in nodes if match_node_by_type(n, value)]
+            match_cache[match_key] = matched
+        return matched
+
+    @staticmethod
+    def _index_snapshot_by_material(snapshot):
+        """将连接快照按材质名称分组，避免每个材质都扫描整个快照"""
+        snapshot_by_material = defaultdict(list)
+        for snapshot_item in snapshot:
+            snapshot_by_material[snapshot_item.material_name].append(snapshot_item)
+        return snapshot_by_material
+
+    def _restore_connections_from_snapshot(self, snapshot_items, node_tree):
+        """从快照条目中恢复材质的连接关系（snapshot_items 为该材质的快照条目）"""
         restored_count = 0
+        nodes_by_name = {node.name: node for node in node_tree.nodes}
 
-        for snapshot_item in props.connection_snapshot:
-            if snapshot_item.material_name != material_name:
-                continue
-
+        for snapshot_item in snapshot_items:
             from_node_name = snapshot_item.from_node_name
             to_node_name = snapshot_item.to_node_name
             from_socket_index = snapshot_item.from_socket_index
@@ -298,8 +448,8 @@ class MATERIAL_OT_reconnect_with_rules(Operator):
             if not from_node_name or not to_node_name:
                 continue
 
-            from_node = node_tree.nodes.get(from_node_name)
-            to_node = node_tree.nodes.get(to_node_name)
+            from_node = nodes_by_name.get(from_node_name)
+            to_node = nodes_by_name.get(to_node_name)
 
             if not from_node or not to_node:
                 continue
@@ -322,93 +472,80 @@ class MATERIAL_OT_reconnect_with_rules(Operator):
         scene = context.scene
         props = scene.shader_replacer_props
 
-        shader_types = self.get_shader_types_to_reconnect(props)
+        # 属性只读取一次，循环中使用局部变量
+        auto_connect = props.auto_connect
+
+        # 规则属性只读取一次；任一端不会匹配任何节点的规则直接排除
+        active_rules = []
+        for rule in props.connection_rules:
+            source_key = self._rule_match_key(
+                rule.source_match_mode, rule.source_node_label, rule.source_node_type)
+            target_key = self._rule_match_key(
+                rule.target_match_mode, rule.target_node_label, rule.target_node_type)
+            if source_key and target_key:
+                active_rules.append(
+                    (source_key, target_key, rule.source_socket_index, rule.target_socket_index))
 
         auto_connect_count = 0
         custom_rule_count = 0
         restored_count = 0
-        processed_materials = set()
 
         has_snapshot = len(props.connection_snapshot) > 0
+        snapshot_by_material = {}
+        if has_snapshot and props.enable_connection_recording:
+            snapshot_by_material = self._index_snapshot_by_material(props.connection_snapshot)
+
+        for mat in _iter_node_materials(selected_objects, props.replace_mode, props.target_material):
+            node_tree = mat.node_tree
+            nodes = node_tree.nodes
+            links = node_tree.links
+
+            if auto_connect:
+                auto_connect_count += AutoConnectionRules.apply_auto_connections(
+                    nodes, links, props)
+
+            # 规则只修改连接、不增删节点，同一材质内匹配结果可以复用
+            match_cache = {}
+            for source_key, target_key, source_socket_index, target_socket_index in active_rules:
+                source_nodes = self._match_rule_nodes(nodes, source_key, match_cache)
+                if not source_nodes:
+                    continue
+                target_nodes = self._match_rule_nodes(nodes, target_key, match_cache)
+                if not target_nodes:
+                    continue
 
-        for obj in selected_objects:
-            if obj.type == 'MESH':
-                for slot in obj.material_slots:
-                    if slot.material and slot.material.use_nodes:
-                        mat = slot.material
-
-                        if mat.name in processed_materials:
+                for source_node in source_nodes:
+                    for target_node in target_nodes:
+                        if source_node == target_node:
                             continue
 
-                        should_process = True
-                        if props.replace_mode in ('MATERIAL', 'MATERIAL_SPECIFIC'):
-                            if props.target_material:
-                                should_process = (mat.name == props.target_material.name)
+                        if (source_socket_index < len(source_node.outputs) and
+                                target_socket_index < len(target_node.inputs)):
 
-                        if not should_process:
-                            continue
+                            source_socket = source_node.outputs[source_socket_index]
+                            target_socket = target_node.inputs[target_socket_index]
 
-                        processed_materials.add(mat.name)
-                        node_tree = mat.node_tree
-                        nodes = node_tree.nodes
-                        links = node_tree.links
-
-                        if props.auto_connect:
-                            auto_connect_count += AutoConnectionRules.apply_auto_connections(
-                                nodes, links, props)
-
-                        for rule in props.connection_rules:
-                            source_nodes = []
-                            if rule.source_match_mode == 'LABEL':
-                                if rule.source_node_label:
-                                    source_nodes = [n for n in nodes if match_node_by_label_or_name(
-                                        n, rule.source_node_label)]
+                            if not safe_link(links, source_socket, target_socket):
+                                print(
+                                    f"连接失败: {source_node.name}[{source_socket_index}] -> {target_node.name}[{target_socket_index}]")
                             else:
-                                if rule.source_node_type and not rule.source_node_type.startswith('__'):
-                                    source_nodes = [n for n in nodes if match_node_by_type(
-                                        n, rule.source_node_type)]
-
-                            target_nodes = []
-                            if rule.target_match_mode == 'LABEL':
-                                if rule.target_node_label:
-                                    target_nodes = [n for n in nodes if match_node_by_label_or_name(
-                                        n, rule.target_node_label)]
-                            else:
-                                if rule.target_node_type and not rule.target_node_type.startswith('__'):
-                                    target_nodes = [n for n in nodes if match_node_by_type(
-                                        n, rule.target_node_type)]
-
-                            for source_node in source_nodes:
-                                for target_node in target_nodes:
-                                    if source_node == target_node:
-                                        continue
-
-                                    if (rule.source_socket_index < len(source_node.outputs) and
-                                            rule.target_socket_index < len(target_node.inputs)):
-
-                                        source_socket = source_node.outputs[rule.source_socket_index]
-                                        target_socket = target_node.inputs[rule.target_socket_index]
-
-                                        if not safe_link(links, source_socket, target_socket):
-                                            print(
-                                                f"连接失败: {source_node.name}[{rule.source_socket_index}] -> {target_node.name}[{rule.target_socket_index}]")
-                                        else:
-                                            custom_rule_count += 1
+                                custom_rule_count += 1
 
-                        # 只有在启用连接关系记录时才恢复连接快照
-                        if has_snapshot and props.enable_connection_recording:
-                            restored_count += self._restore_connections_from_snapshot(
-                                props, node_tree, mat.name)
+            # 只有在启用连接关系记录时才恢复连接快照
+            snapshot_items = snapshot_by_material.get(mat.name)
+            if snapshot_items:
+                restored_count += self._restore_connections_from_snapshot(
+                    snapshot_items, node_tree)
 
         if has_snapshot:
-            if props.auto_connect:
+            if auto_connect:
                 self.report(
                     {'INFO'}, f"自动连接: {auto_connect_count}, 自定义规则: {custom_rule_count}, 恢复连接: {restored_count}")
             else:
                 self.report(
                     {'INFO'}, f"自定义规则: {custom_rule_count}, 恢复连接: {restored_count} (自动连接已关闭)")
         else:
-            if props.auto_connect:
+            if auto_connect:
                 self.report(
                     {'INFO'}, f"自动连接: {auto_connect_count} 个, 自定义规则连接: {custom_rule_count} 个")
             else:
@@ -431,37 +568,11 @@ class MATERIAL_OT_batch_replace_shader(Operator):
         if output_type == input_type:
             return 100
 
-        # 兼容性矩阵
-        compatibility = {
-            ('RGBA', 'RGBA'): 100,
-            ('RGBA', 'VECTOR'): 80,
-            ('RGBA', 'VALUE'): 60,
-            ('VECTOR', 'VECTOR'): 100,
-            ('VECTOR', 'RGBA'): 80,
-            ('VALUE', 'VALUE'): 100,
-            ('VALUE', 'RGBA'): 60,
-            ('SHADER', 'SHADER'): 100,
-        }
-
-        return compatibility.get((output_type, input_type), 0)
-
-    def get_socket_index(self, socket_collection, target_socket):
-        """
-        安全地获取 socket 在集合中的索引
-
-        参数:
-            socket_collection: inputs 或 outputs 集合
-            target_socket: 要查找的 socket
-        返回:
-            索引值，如果未找到返回 -1
-        """
-        try:
-            for i, socket in enumerate(socket_collection):
-                if socket == target_socket:
-                    return i
-        except ReferenceError:
-            pass
-        return -1
+        output_index = _SOCKET_TYPE_INDEX.get(output_type)
+        input_index = _SOCKET_TYPE_INDEX.get(input_type)
+        if output_index is None or input_index is None:
+            return 0
+        return _SOCKET_TYPE_COMPAT[output_index * _SOCKET_TYPE_COUNT + input_index]
 
     def _find_alpha_input(self, shader_node):
         """
@@ -496,54 +607,40 @@ class MATERIAL_OT_batch_replace_shader(Operator):
         """
         if is_alpha:
             # Alpha 输出：只连接明确的 alpha 相关接口
-            alpha_keywords = ['alpha', 'opacity', 'transparency', '透明']
-            matching_inputs = []
-
-            for idx, inp in enumerate(shader_node.inputs):
+            # 按序号遍历，第一个匹配即为序号最小的接口；没有匹配则不连接
+            for inp in shader_node.inputs:
                 if inp in connected_inputs:
                     continue
-                inp_name_lower = inp.name.lower()
-                if any(kw in inp_name_lower for kw in alpha_keywords):
-                    matching_inputs.append((idx, inp))
-
-            # 返回序号最小的匹配接口
-            if matching_inputs:
-                matching_inputs.sort(key=lambda x: x[0])
-                return matching_inputs[0][1]
+                if IMAGE_ALPHA_INPUT_RE.search(inp.name.lower()):
+                    return inp
 
-            # 没有匹配则不连接
             return None
 
         else:
             # Color 输出：按优先级查找颜色相关接口
-            color_keywords = [
-                'base color', 'basecolor',  # 最高优先级
-                'color', '颜色',             # 第二优先级（包含"颜色"的都在这里）
-                'diffuse', '漫反射',         # 第三优先级
-                'albedo', '反照率', '基础色',  # 第四优先级
-            ]
-
-            # 按关键词优先级查找
-            for keyword in color_keywords:
-                matching_inputs = []
-                for idx, inp in enumerate(shader_node.inputs):
-                    if inp in connected_inputs:
-                        continue
-                    inp_name_lower = inp.name.lower()
-
-                    # 检查是否包含关键词
-                    if keyword in inp_name_lower:
-                        matching_inputs.append((idx, inp))
-
-                # 找到匹配的关键词，返回序号最小的
-                if matching_inputs:
-                    matching_inputs.sort(key=lambda x: x[0])
-                    return matching_inputs[0][1]
-
-            # 没有匹配颜色关键词，使用原有规则（语义匹配）
-            return None
+            # 按关键词优先级查找，同一关键词返回序号最小的
+            # 没有匹配颜色关键词时返回 None，使用原有规则（语义匹配）
+            return find_input_by_keyword_priority(
+                [(inp, inp.name.lower()) for inp in shader_node.inputs],
+                connected_inputs, IMAGE_COLOR_INPUT_KEYWORDS)
+
+    @staticmethod
+    def _build_input_socket_table(shader_node):
+        """
+        构建输入接口候选表，名称、小写名称、语义和类型只计算一次
 
-    def _find_best_input_socket(self, shader_node, original_name, original_type, connected_inputs):
+        返回:
+            [(序号, 接口, 名称, 小写名称, 语义, 类型), ...]
+        """
+        table = []
+        for idx, inp in enumerate(shader_node.inputs):
+            inp_name = inp.name
+            inp_name_lower = inp_name.lower()
+            table.append((idx, inp, inp_name, inp_name_lower, _semantic_of(inp_name_lower), inp.type))
+        return table
+
+    def _find_best_input_socket(self, shader_node, original_name, original_type, connected_mask,
+                                socket_table=None):
         """
         智能查找最佳匹配的输入接口
 
@@ -553,54 +650,86 @@ class MATERIAL_OT_batch_replace_shader(Operator):
         - 语义匹配: +0~100
         - 类型兼容: +0~100
         - 接口位置: 越靠前越优先 +10~1
+
+        connected_mask 为已连接输入的位掩码（第 idx 位表示第 idx 个输入已连接）；
+        socket_table 为 _build_input_socket_table 的结果，同一节点多次查找时传入以复用。
+
+        返回:
+            (最佳输入接口, 序号)，没有足够匹配时返回 (None, -1)
         """
 
-        original_semantic = SocketSemantics.get_socket_semantic(original_name)
+        if socket_table is None:
+            socket_table = self._build_input_socket_table(shader_node)
+
+        # 名称只转一次小写，直接传给语义分类，避免内层循环重复分配字符串
+        original_name_lower = original_name.lower()
+        original_semantic = _semantic_of(original_name_lower)
         candidates = []
 
-        for idx, inp in enumerate(shader_node.inputs):
-            if inp in connected_inputs:
+        for idx, inp, inp_name, inp_name_lower, input_semantic, inp_type in socket_table:
+            if connected_mask >> idx & 1:
                 continue
 
             score = 0
 
             # 1. 名称匹配（最高优先级）
-            if inp.name == original_name:
+            if inp_name == original_name:
                 score += 100
-            elif inp.name.lower() == original_name.lower():
+            elif inp_name_lower == original_name_lower:
                 score += 90
-            elif original_name.lower() in inp.name.lower() or inp.name.lower() in original_name.lower():
+            elif original_name_lower in inp_name_lower or inp_name_lower in original_name_lower:
                 score += 50
 
             # 2. 语义匹配
-            input_semantic = SocketSemantics.get_socket_semantic(inp.name)
             semantic_score = SocketSemantics.are_semantically_compatible(
                 original_semantic, input_semantic)
             score += semantic_score * 0.8  # 权重0.8
 
             # 3. 类型兼容性
             type_score = self._get_type_compatibility_score(
-                original_type, inp.type)
+                original_type, inp_type)
             score += type_score * 0.6  # 权重0.6
 
             # 4. 位置优先级（前面的接口优先）
             position_score = max(0, 10 - idx)
             score += position_score
 
-            candidates.append((inp, score))
+            candidates.append((idx, inp, score))
 
-        # 按分数排序，返回最高分
+        # 按分数排序（稳定排序，同分时序号小的优先），返回最高分
         if candidates:
-            candidates.sort(key=lambda x: x[1], reverse=True)
-            best_socket, best_score = candidates[0]
+            candidates.sort(key=lambda x: x[2], reverse=True)
+            best_idx, best_socket, best_score = candidates[0]
 
             # 只有分数足够高才连接（避免错误连接）
             if best_score >= 30:
-                return best_socket
+                return best_socket, best_idx
 
-        return None
+        return None, -1
 
-    def _find_best_output_socket(self, shader_node, original_name, original_type, connected_outputs):
+    @staticmethod
+    def _build_output_socket_table(shader_node):
+        """
+        构建输出接口查找表，每种键只保留第一个匹配的接口
+
+        返回:
+            (按名称, 按小写名称, 按类型, 第一个输出接口或 None)
+        """
+        by_name = {}
+        by_name_lower = {}
+        by_type = {}
+        first_output = None
+        for out in shader_node.outputs:
+            if first_output is None:
+                first_output = out
+            out_name = out.name
+            by_name.setdefault(out_name, out)
+            by_name_lower.setdefault(out_name.lower(), out)
+            by_type.setdefault(out.type, out)
+        return by_name, by_name_lower, by_type, first_output
+
+    def _find_best_output_socket(self, shader_node, original_name, original_type, connected_outputs,
+                                 socket_table=None):
         """
         智能查找最佳匹配的输出接口
 
@@ -613,29 +742,28 @@ class MATERIAL_OT_batch_replace_shader(Operator):
             original_name: 原始接口名称
             original_type: 原始接口类型
             connected_outputs: 已使用的输出接口集合
+            socket_table: _build_output_socket_table 的结果，同一节点多次查找时传入以复用
         返回:
             最佳匹配的输出接口，或 None
         """
-        # 规则1：优先匹配相同名称的接口
-        if original_name in shader_node.outputs:
-            return shader_node.outputs[original_name]
+        if socket_table is None:
+            socket_table = self._build_output_socket_table(shader_node)
+        by_name, by_name_lower, by_type, first_output = socket_table
 
-        # 尝试不区分大小写匹配
-        original_name_lower = original_name.lower()
-        for out in shader_node.outputs:
-            if out.name.lower() == original_name_lower:
-                return out
+        # 规则1：优先匹配相同名称的接口，其次不区分大小写匹配
+        out = by_name.get(original_name)
+        if out is None:
+            out = by_name_lower.get(original_name.lower())
 
         # 规则2：查找第一个相同类型的接口
-        for out in shader_node.outputs:
-            if out.type == original_type:
-                return out
+        if out is None:
+            out = by_type.get(original_type)
 
         # 如果没有匹配，返回第一个输出
-        if len(shader_node.outputs) > 0:
-            return shader_node.outputs[0]
+        if out is None:
+            out = first_output
 
-        return None
+        return out
 
     def _find_shader_output(self, shader_node):
         """
@@ -647,15 +775,7 @@ class MATERIAL_OT_batch_replace_shader(Operator):
         返回:
             SHADER 类型输出接口，或第一个输出，或 None
         """
-        for out in shader_node.outputs:
-            if out.type == 'SHADER':
-                return out
-
-        # 如果没有 SHADER 类型，返回第一个输出
-        if len(shader_node.outputs) > 0:
-            return shader_node.outputs[0]
-
-        return None
+        return find_shader_output(shader_node)
 
     def execute(self, context):
         """执行替换操作"""
@@ -678,11 +798,8 @@ class MATERIAL_OT_batch_replace_shader(Operator):
             return {'CANCELLED'}
 
         # 验证着色器是否存在
-        node_group_exists = any(
-            ng.name == target_shader_name
-            for ng in bpy.data.node_groups
-            if ng.type == 'SHADER'
-        )
+        target_node_group = bpy.data.node_groups.get(target_shader_name)
+        node_group_exists = target_node_group is not None and target_node_group.type == 'SHADER'
 
         if not node_group_exists and not NodeTypeConfig.is_valid_builtin_shader(target_shader_name):
             self.report({'ERROR'}, f"未找到着色器: '{target_shader_name}',请检查名称是否正确")
@@ -715,7 +832,7 @@ class MATERIAL_OT_batch_replace_shader(Operator):
                 return {'CANCELLED'}
 
             # 清空材质缓存
-            MaterialCache.clear()
+            clear_material_cache()
 
             # 材质模式下默认替换所有着色器
             specific_shader_name = ""
@@ -754,7 +871,7 @@ class MATERIAL_OT_batch_replace_shader(Operator):
                 material_specific_shader_name = props.material_specific_nodegroup.name
 
             # 清空材质缓存
-            MaterialCache.clear()
+            clear_material_cache()
 
             result = self.replace_material_shaders(
                 mat, props, target_shader_name, material_specific_shader_name)
@@ -792,7 +909,7 @@ class MATERIAL_OT_batch_replace_shader(Operator):
             return {'CANCELLED'}
 
         # 清空材质缓存
-        MaterialCache.clear()
+        clear_material_cache()
 
         # 统计信息
         total_materials = 0
@@ -800,24 +917,21 @@ class MATERIAL_OT_batch_replace_shader(Operator):
         replaced_shaders = 0
 
         # 遍历所有目标对象
-        for obj in target_objects:
-            if obj.type == 'MESH':
-                for slot in obj.material_slots:
-                    if slot.material and slot.material.use_nodes:
-                        mat = slot.material
-                        total_materials += 1
-
-                        # 检查缓存
-                        if MaterialCache.is_processed(mat):
-                            result = MaterialCache.get_result(mat)
-                        else:
-                            result = self.replace_material_shaders(
-                                mat, props, target_shader_name, specific_shader_name)
-                            MaterialCache.mark_processed(mat, result)
-
-                        if result > 0:
-                            replaced_materials += 1
-                            replaced_shaders += result
+        # 共用的材质按材质槽计数，重复出现时直接读取缓存结果
+        for mat in _iter_slot_materials(target_objects):
+            total_materials += 1
+
+            # 检查缓存
+            if is_material_processed(mat):
+                result = get_material_result(mat)
+            else:
+                result = self.replace_material_shaders(
+                    mat, props, target_shader_name, specific_shader_name)
+                mark_material_processed(mat, result)
+
+            if result > 0:
+                replaced_materials += 1
+                replaced_shaders += result
 
         # 显示结果
         if replaced_shaders == 0:
@@ -832,6 +946,199 @@ class MATERIAL_OT_batch_replace_shader(Operator):
 
         return {'FINISHED'}
 
+    @staticmethod
+    def _cached_socket_index(node, socket, is_output, index_maps):
+        """
+        获取接口在节点输入/输出列表中的序号，未找到返回 -1
+
+        每个节点的 接口指针 -> 序号 映射只构建一次并保存在 index_maps 中。
+        """
+        key = (node.as_pointer(), is_output)
+        indices = index_maps.get(key)
+        if indices is None:
+            sockets = node.outputs if is_output else node.inputs
+            indices = {sock.as_pointer(): i for i, sock in enumerate(sockets)}
+            index_maps[key] = indices
+        return indices.get(socket.as_pointer(), -1)
+
+    def _connect_new_shader(self, new_shader, input_links, output_links, nodes_by_name, links,
+                            fallback_surface_input):
+        """
+        按记录的旧连接为新着色器智能连接输入和输出
+
+        输入、输出两个阶段共用同一次调用内的已连接状态；
+        没有连接到材质输出时，使用 fallback_surface_input 作为保底连接。
+        nodes_by_name 为当前节点树的 名称 -> 节点 映射。
+
+        返回:
+            是否替换了材质输出 Surface 接口上已有的（其他节点的）连接
+        """
+        replaced_linked_surface = False
+
+        # ========== 智能连接输入 ==========
+        connected_input_mask = 0
+        input_socket_table = self._build_input_socket_table(new_shader)
+
+        for socket_name, connections in input_links.items():
+            for conn in connections:
+                source_node = nodes_by_name.get(conn['from_node'])
+                if not source_node:
+                    continue
+
+                # 获取源接口
+                source_socket = None
+                if 0 <= conn['from_socket_index'] < len(source_node.outputs):
+                    source_socket = source_node.outputs[conn['from_socket_index']]
+
+                if not source_socket:
+                    source_socket = source_node.outputs.get(conn['from_socket'])
+
+                if not source_socket:
+                    continue
+
+                # 查找最佳匹配的输入接口
+                target_socket, target_index = self._find_best_input_socket(
+                    new_shader, socket_name, conn['to_socket_type'], connected_input_mask,
+                    input_socket_table
+                )
+
+                if target_socket:
+                    if safe_link(links, source_socket, target_socket):
+                        connected_input_mask |= 1 << target_index
+
+        # ========== 智能连接输出 ==========
+        # 新着色器的第一个输出（优先 SHADER 类型），规则4与保底逻辑共用
+        shader_out = self._find_shader_output(new_shader)
+        # 没有记录的输出连接且新着色器没有输出时，后续逻辑均无事可做
+        if not output_links and shader_out is None:
+            return replaced_linked_surface
+
+        connected_outputs = set()
+        output_connected_to_material = False  # 标记是否已连接到材质输出
+        output_socket_table = (self._build_output_socket_table(new_shader)
+                               if output_links else None)
+
+        # 首先处理已记录的输出连接
+        for socket_name, connections in output_links.items():
+            for conn in connections:
+                target_node = nodes_by_name.get(conn['to_node'])
+                if not target_node:
+                    continue
+
+                # 规则4：着色器输出到材质输出节点的特殊处理
+                if target_node.type == 'OUTPUT_MATERIAL' and not output_connected_to_material:
+                    # 优先使用第一个 SHADER 类型输出连接到 Surface
+                    source_socket = shader_out
+                    if source_socket:
+                        # 优先连接到 Surface 接口（第一个接口）
+                        surface_input = _get_surface_input(target_node)
+
+                        if surface_input:
+                            # Surface 已被其他节点连接时，新连接会替换它
+                            if surface_input.is_linked:
+                                replaced_linked_surface = True
+                            if safe_link(links, source_socket, surface_input):
+                                connected_outputs.add(
+                                    source_socket)
+                                output_connected_to_material = True
+                            continue
+
+                # 获取目标接口
+                target_socket = None
+                if 0 <= conn['to_socket_index'] < len(target_node.inputs):
+                    target_socket = target_node.inputs[conn['to_socket_index']]
+
+                if not target_socket:
+                    target_socket = target_node.inputs.get(conn['to_socket'])
+
+                if not target_socket:
+                    continue
+
+                # 标准输出连接逻辑
+                source_socket = self._find_best_output_socket(
+                    new_shader, socket_name, conn['from_socket_type'], connected_outputs,
+                    output_socket_table
+                )
+
+                if source_socket:
+                    if safe_link(links, source_socket, target_socket):
+                        connected_outputs.add(source_socket)
+
+        # ========== 保底逻辑：确保连接到材质输出节点 ==========
+        # 如果还没有连接到材质输出节点，主动查找并连接
+        if not output_connected_to_material and fallback_surface_input:
+            source_socket = shader_out
+            if source_socket:
+                # Surface 已被其他节点连接时，新连接会替换它
+                if fallback_surface_input.is_linked:
+                    replaced_linked_surface = True
+                if safe_link(links, source_socket, fallback_surface_input):
+                    output_connected_to_material = True
+
+        return replaced_linked_surface
+
+    def _collect_shader_links(self, links, shader_names):
+        """
+        遍历一次连接，收集指定节点的输入/输出连接信息
+
+        参数:
+            links: 节点树的连接集合
+            shader_names: 需要收集的节点名称集合
+        返回:
+            (输入连接, 输出连接)，均为 {节点名称: {接口名称: [连接信息, ...]}}
+        """
+        incoming_links = defaultdict(lambda: defaultdict(list))
+        outgoing_links = defaultdict(lambda: defaultdict(list))
+        if not shader_names:
+            return incoming_links, outgoing_links
+
+        # 每个节点的 接口指针 -> 序号 映射只构建一次
+        index_maps = {}
+
+        for link in links:
+            try:
+                from_node = link.from_node
+                to_node = link.to_node
+                to_node_name = to_node.name
+                from_node_name = from_node.name
+
+                # 与待替换节点无关的连接不读取接口信息
+                collect_input = to_node_name in shader_names
+                collect_output = from_node_name in shader_names
+                if not (collect_input or collect_output):
+                    continue
+
+                from_socket = link.from_socket
+                to_socket = link.to_socket
+
+                # 收集输入连接（记录更多信息用于智能匹配）
+                if collect_input:
+                    incoming_links[to_node_name][to_socket.name].append({
+                        'from_node': from_node_name,
+                        'from_node_type': from_node.type,
+                        'from_socket': from_socket.name,
+                        'from_socket_type': from_socket.type,
+                        'from_socket_index': self._cached_socket_index(from_node, from_socket, True, index_maps),
+                        'to_socket_index': self._cached_socket_index(to_node, to_socket, False, index_maps),
+                        'to_socket_type': to_socket.type
+                    })
+
+                # 收集输出连接（增强版）
+                if collect_output:
+                    outgoing_links[from_node_name][from_socket.name].append({
+                        'to_node': to_node_name,
+                        'to_node_type': to_node.type,
+                        'to_socket': to_socket.name,
+                        'to_socket_type': to_socket.type,
+                        'to_socket_index': self._cached_socket_index(to_node, to_socket, False, index_maps),
+                        'from_socket_index': self._cached_socket_index(from_node, from_socket, True, index_maps),
+                        'from_socket_type': from_socket.type
+                    })
+            except ReferenceError:
+                continue
+
+        return incoming_links, outgoing_links
+
     def get_shader_name_from_enum(self, enum_value):
         """从枚举值获取实际的着色器名称"""
         if not enum_value or enum_value == 'NONE':
@@ -883,45 +1190,59 @@ class MATERIAL_OT_batch_replace_shader(Operator):
         # 查找要替换的着色器节点
         shaders_to_replace = []
 
-        # 查找连接到材质输出的节点
-        nodes_connected_to_output = set()
-        for link in links:
-            if link.to_node.type == 'OUTPUT_MATERIAL':
-                nodes_connected_to_output.add(link.from_node.name)
-
         if props.replace_mode == 'ALL' or props.replace_mode == 'MATERIAL':
             # 'ALL' 模式：替换所有着色器
             # 'MATERIAL' 模式：在特定材质中替换所有着色器
-            for node in nodes:
-                if node.type in NodeTypeConfig.SHADER_NODE_TYPES:
-                    shaders_to_replace.append(node.name)
-
-                elif node.type == 'GROUP' and node.node_tree:
-                    should_replace = False
-
-                    has_shader_output = any(
-                        out.type == 'SHADER' for out in node.outputs)
-                    if has_shader_output:
-                        should_replace = True
 
-                    if node.name in nodes_connected_to_output:
-                        should_replace = True
+            # 连接到材质输出的节点，只有节点组未命中关键词时才需要，首次用到时再收集
+            nodes_connected_to_output = None
 
-                    ng_name_lower = node.node_tree.name.lower()
-                    if any(kw in ng_name_lower for kw in NodeTypeConfig.SHADER_KEYWORDS):
-                        should_replace = True
+            shader_types = NodeTypeConfig.SHADER_NODE_TYPES
+            node_group_info = {}  # 节点组指针 -> (名称, 名称是否包含着色器关键词)
+            for node in nodes:
+                node_type = node.type
+                if node_type in shader_types:
+                    shaders_to_replace.append(node.name)
+                    continue
+                if node_type != 'GROUP':
+                    continue
+                node_group = node.node_tree
+                if not node_group:
+                    continue
+                # 同一节点组被多个节点引用时，名称和关键词检查只做一次
+                group_key = node_group.as_pointer()
+                group_info = node_group_info.get(group_key)
+                if group_info is None:
+                    ng_name = node_group.name
+                    group_info = (ng_name, NodeTypeConfig.has_shader_keyword(ng_name.lower()))
+                    node_group_info[group_key] = group_info
+                ng_name, has_shader_keyword = group_info
+
+                # 已经是目标着色器的节点组不替换
+                if ng_name == target_shader_name:
+                    continue
 
-                    if should_replace:
-                        if node.node_tree.name != target_shader_name:
-                            shaders_to_replace.append(node.name)
+                # 满足任一条件即替换，依次检查由快到慢
+                if not has_shader_keyword and nodes_connected_to_output is None:
+                    nodes_connected_to_output = {
+                        link.from_node.name for link in links
+                        if link.to_node.type == 'OUTPUT_MATERIAL'
+                    }
+                node_name = node.name
+                if (has_shader_keyword
+                        or node_name in nodes_connected_to_output
+                        or any(out.type == 'SHADER' for out in node.outputs)):
+                    shaders_to_replace.append(node_name)
         elif props.replace_mode == 'SPECIFIC' or props.replace_mode == 'MATERIAL_SPECIFIC':
             # 'SPECIFIC' 模式：替换特定着色器
             # 'MATERIAL_SPECIFIC' 模式：在特定材质中替换特定着色器
             for node in nodes:
-                if node.type == 'GROUP' and node.node_tree:
-                    if node.node_tree.name == specific_shader_name:
+                node_type = node.type
+                if node_type == 'GROUP':
+                    node_group = node.node_tree
+                    if node_group and node_group.name == specific_shader_name:
                         shaders_to_replace.append(node.name)
-                elif node.type == specific_shader_name:
+                elif node_type == specific_shader_name:
                     shaders_to_replace.append(node.name)
 
         if not shaders_to_replace:
@@ -929,200 +1250,83 @@ class MATERIAL_OT_batch_replace_shader(Operator):
 
         replaced_count = 0
 
+        # 目标着色器对所有替换都相同，只解析一次（节点组优先，否则为内置着色器类名）
+        node_group = bpy.data.node_groups.get(target_shader_name)
+        if node_group is not None and node_group.type != 'SHADER':
+            node_group = None
+        shader_class_name = None
+        if node_group is None:
+            shader_class_name = NodeTypeConfig.get_shader_class_name(target_shader_name)
+
+        auto_connect = props.auto_connect
+
+        # 材质输出节点不会被替换，保底连接使用的 Surface 接口只查找一次
+        output_node = get_material_output_node(node_tree)
+        fallback_surface_input = _get_surface_input(output_node) if output_node else None
+
+        # 名称 -> 节点 映射，删除旧节点、创建新节点时同步更新
+        nodes_by_name = {node.name: node for node in nodes}
+
+        # 一次遍历收集所有待替换节点的连接信息
+        pending_shaders = set(shaders_to_replace)
+        incoming_links, outgoing_links = self._collect_shader_links(links, pending_shaders)
+        links_stale = False
+
         # 替换每个着色器节点
         for old_shader_name in shaders_to_replace:
-            old_shader = nodes.get(old_shader_name)
+            pending_shaders.discard(old_shader_name)
+
+            # 上一次替换改动了其他待替换节点的连接时，重新收集剩余节点的连接信息
+            if links_stale:
+                incoming_links, outgoing_links = self._collect_shader_links(links, pending_shaders)
+                links_stale = False
+
+            old_shader = nodes_by_name.get(old_shader_name)
             if old_shader is None:
                 continue
 
             # 保存旧节点的连接信息（增强版）
-            input_links = {}
-            output_links = {}
-            old_location = old_shader.location.copy()
-
-            # 收集输入连接（记录更多信息用于智能匹配）
-            links_snapshot = list(links)
-            for link in links_snapshot:
-                try:
-                    if link.to_node == old_shader:
-                        socket_name = link.to_socket.name
-                        socket_index = self.get_socket_index(
-                            old_shader.inputs, link.to_socket)
-                        socket_type = link.to_socket.type
-                        if socket_name not in input_links:
-                            input_links[socket_name] = []
-                        input_links[socket_name].append({
-                            'from_node': link.from_node.name,
-                            'from_node_type': link.from_node.type,
-                            'from_socket': link.from_socket.name,
-                            'from_socket_type': link.from_socket.type,
-                            'from_socket_index': self.get_socket_index(link.from_node.outputs, link.from_socket),
-                            'to_socket_index': socket_index,
-                            'to_socket_type': socket_type
-                        })
-                except ReferenceError:
-                    continue
-
-            # 收集输出连接（增强版）
-            for link in links_snapshot:
-                try:
-                    if link.from_node == old_shader:
-                        socket_name = link.from_socket.name
-                        socket_index = self.get_socket_index(
-                            old_shader.outputs, link.from_socket)
-                        socket_type = link.from_socket.type
-                        if socket_name not in output_links:
-                            output_links[socket_name] = []
-                        output_links[socket_name].append({
-                            'to_node': link.to_node.name,
-                            'to_node_type': link.to_node.type,
-                            'to_socket': link.to_socket.name,
-                            'to_socket_type': link.to_socket.type,
-                            'to_socket_index': self.get_socket_index(link.to_node.inputs, link.to_socket),
-                            'from_socket_index': socket_index,
-                            'from_socket_type': socket_type
-                        })
-                except ReferenceError:
-                    continue
+            input_links = incoming_links.pop(old_shader_name, {})
+            output_links = outgoing_links.pop(old_shader_name, {})
+            old_location = old_shader.location[:]  # 以浮点元组保存，不创建 Vector 副本
+
+            # 与其他待替换节点直接相连时，替换会改变它们的连接
+            for connections in input_links.values():
+                for conn in connections:
+                    if conn['from_node'] in pending_shaders:
+                        links_stale = True
+            for connections in output_links.values():
+                for conn in connections:
+                    if conn['to_node'] in pending_shaders:
+                        links_stale = True
 
             # 删除旧节点
             if not safe_remove_node(nodes, old_shader):
                 continue
+            del nodes_by_name[old_shader_name]
 
             # 创建新着色器节点
             try:
-                node_group = None
-                for ng in bpy.data.node_groups:
-                    if ng.type == 'SHADER' and ng.name == target_shader_name:
-                        node_group = ng
-                        break
-
                 if node_group:
                     new_shader = nodes.new(type='ShaderNodeGroup')
                     new_shader.node_tree = node_group
                     new_shader.name = target_shader_name
                     new_shader.label = target_shader_name
                 else:
-                    node_type = NodeTypeConfig.get_shader_class_name(
-                        target_shader_name)
-                    new_shader = nodes.new(type=node_type)
+                    new_shader = nodes.new(type=shader_class_name)
                     new_shader.name = target_shader_name
                     new_shader.label = target_shader_name
 
                 new_shader.location = old_location
-
-                # ========== 智能连接输入 ==========
-                if props.auto_connect:
-                    # AutoConnectionRules.apply_auto_connections(nodes, links, props)
-                    connected_inputs = set()
-
-                    for socket_name, connections in input_links.items():
-                        for conn in connections:
-                            source_node = nodes.get(conn['from_node'])
-                            if not source_node:
-                                continue
-
-                            # 获取源接口
-                            source_socket = None
-                            if 0 <= conn['from_socket_index'] < len(source_node.outputs):
-                                source_socket = source_node.outputs[conn['from_socket_index']]
-
-                            if not source_socket:
-                                for out in source_node.outputs:
-                                    if out.name == conn['from_socket']:
-                                        source_socket = out
-                                        break
-
-                            if not source_socket:
-                                continue
-
-                            # 查找最佳匹配的输入接口
-                            target_socket = self._find_best_input_socket(
-                                new_shader, socket_name, conn['to_socket_type'], connected_inputs
-                            )
-
-                            if target_socket:
-                                if safe_link(links, source_socket, target_socket):
-                                    connected_inputs.add(target_socket)
-                # ========== 智能连接输出 ==========
-                if props.auto_connect:
-                    connected_outputs = set()
-                    output_connected_to_material = False  # 标记是否已连接到材质输出
-
-                    # 首先处理已记录的输出连接
-                    for socket_name, connections in output_links.items():
-                        for conn in connections:
-                            target_node = nodes.get(conn['to_node'])
-                            if not target_node:
-                                continue
-
-                            # 规则4：着色器输出到材质输出节点的特殊处理
-                            if target_node.type == 'OUTPUT_MATERIAL' and not output_connected_to_material:
-                                # 优先使用第一个 SHADER 类型输出连接到 Surface
-                                source_socket = self._find_shader_output(
-                                    new_shader)
-                                if source_socket:
-                                    # 优先连接到 Surface 接口（第一个接口）
-                                    surface_input = None
-                                    if 'Surface' in target_node.inputs:
-                                        surface_input = target_node.inputs['Surface']
-                                    elif len(target_node.inputs) > 0:
-                                        surface_input = target_node.inputs[0]
-
-                                    if surface_input:
-                                        if safe_link(links, source_socket, surface_input):
-                                            connected_outputs.add(
-                                                source_socket)
-                                            output_connected_to_material = True
-                                        continue
-
-                            # 获取目标接口
-                            target_socket = None
-                            if 0 <= conn['to_socket_index'] < len(target_node.inputs):
-                                target_socket = target_node.inputs[conn['to_socket_index']]
-
-                            if not target_socket:
-                                for inp in target_node.inputs:
-                                    if inp.name == conn['to_socket']:
-                                        target_socket = inp
-                                        break
-
-                            if not target_socket:
-                                continue
-
-                            # 标准输出连接逻辑
-                            source_socket = self._find_best_output_socket(
-                                new_shader, socket_name, conn['from_socket_type'], connected_outputs
-                            )
-
-                            if source_socket:
-                                if safe_link(links, source_socket, target_socket):
-                                    connected_outputs.add(source_socket)
-                    # ========== 保底逻辑：确保连接到材质输出节点 ==========
-                    # 如果还没有连接到材质输出节点，主动查找并连接
-                    if not output_connected_to_material:
-                        # 查找材质输出节点
-                        output_node = None
-                        for node in nodes:
-                            if node.type == 'OUTPUT_MATERIAL':
-                                output_node = node
-                                break
-
-                        if output_node:
-                            # 获取新着色器的第一个输出（优先 SHADER 类型）
-                            source_socket = self._find_shader_output(
-                                new_shader)
-                            if source_socket:
-                                # 连接到 Surface 接口（第一个接口）
-                                surface_input = None
-                                if 'Surface' in output_node.inputs:
-                                    surface_input = output_node.inputs['Surface']
-                                elif len(output_node.inputs) > 0:
-                                    surface_input = output_node.inputs[0]
-
-                                if surface_input:
-                                    if safe_link(links, source_socket, surface_input):
-                                        output_connected_to_material = True
+                # 名称可能因重名被自动加上后缀，按最终名称登记
+                nodes_by_name[new_shader.name] = new_shader
+
+                # ========== 智能连接 ==========
+                if auto_connect:
+                    if self._connect_new_shader(new_shader, input_links, output_links, nodes_by_name, links,
+                                                fallback_surface_input):
+                        # 可能替换了其他待替换节点到材质输出的连接
+                        links_stale = True
                 replaced_count += 1
             except Exception as e:
                 print(f"创建着色器节点时出错: {e}")
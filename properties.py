@@ -19,6 +19,34 @@ from .node_config import (
 )
 
 
+# 节点匹配方式（源节点与目标节点共用）
+_MATCH_MODE_ITEMS = (
+    ('LABEL', "按标签/名称", "通过节点的标签或名称进行匹配"),
+    ('TYPE', "按节点类型", "通过节点类型进行匹配"),
+)
+
+# 内置着色器选项（目标着色器与替换特定着色器共用）
+_BUILTIN_SHADER_ITEMS = (
+    ('NONE', '-- 未选择 --', '不使用内置着色器'),
+    ('BSDF_PRINCIPLED', '原理化BSDF', '基础PBR着色器'),
+    ('BSDF_DIFFUSE', '漫射BSDF', '漫反射着色器'),
+    ('BSDF_GLOSSY', '光泽BSDF', '光泽着色器'),
+    ('BSDF_TRANSPARENT', '透明BSDF', '透明着色器'),
+    ('BSDF_GLASS', '玻璃BSDF', '玻璃着色器'),
+    ('BSDF_TRANSLUCENT', '半透明BSDF', '半透明着色器'),
+    ('BSDF_REFRACTION', '折射BSDF', '折射着色器'),
+    ('BSDF_TOON', '卡通BSDF', '卡通着色器'),
+    ('BSDF_SHEEN', '光泽BSDF', '光泽着色器'),
+    ('EMISSION', '自发光', '自发光着色器'),
+    ('SUBSURFACE_SCATTERING', '次表面散射', '次表面散射'),
+    ('VOLUME_ABSORPTION', '体积吸收', '体积吸收'),
+    ('VOLUME_SCATTER', '体积散射', '体积散射'),
+    ('VOLUME_PRINCIPLED', '原理化体积', '原理化体积着色器'),
+    ('MIX_SHADER', '混合着色器', '混合两个着色器'),
+    ('ADD_SHADER', '相加着色器', '相加两个着色器'),
+)
+
+
 class ConnectionRuleItem(PropertyGroup):
     """连接规则项"""
 
@@ -26,9 +54,7 @@ class ConnectionRuleItem(PropertyGroup):
     source_match_mode: EnumProperty(
         name="源节点匹配方式",
         description="选择如何匹配源节点",
-        items=[
-            ('LABEL', "按标签/名称", "通过节点的标签或名称进行匹配"),
-            ('TYPE', "按节点类型", "通过节点类型进行匹配"),],
+        items=_MATCH_MODE_ITEMS,
         default='LABEL'
     )
 
@@ -55,10 +81,7 @@ class ConnectionRuleItem(PropertyGroup):
     target_match_mode: EnumProperty(
         name="目标节点匹配方式",
         description="选择如何匹配目标节点",
-        items=[
-            ('LABEL', "按标签/名称", "通过节点的标签或名称进行匹配"),
-            ('TYPE', "按节点类型", "通过节点类型进行匹配"),
-        ],
+        items=_MATCH_MODE_ITEMS,
         default='LABEL'
     )
 
@@ -166,6 +189,48 @@ class ConnectionSnapshotItem(PropertyGroup):
     )
 
 
+def _poll_shader_tree(self, node_tree):
+    """节点组选择仅列出着色器节点树"""
+    return node_tree.type == 'SHADER'
+
+
+# 互斥选择逻辑：当选择内置着色器时，清空节点组选择
+def _on_builtin_shader_changed(self, context):
+    """当内置着色器改变时，清空节点组选择"""
+    if self.builtin_shader != 'NONE':
+        self.shader_nodegroup = None
+
+
+def _on_shader_nodegroup_changed(self, context):
+    """当节点组改变时，清空内置着色器选择"""
+    if self.shader_nodegroup is not None:
+        self.builtin_shader = 'NONE'
+
+
+def _on_specific_builtin_shader_changed(self, context):
+    """当特定内置着色器改变时，清空特定节点组选择"""
+    if self.specific_builtin_shader != 'NONE':
+        self.specific_nodegroup = None
+
+
+def _on_specific_nodegroup_changed(self, context):
+    """当特定节点组改变时，清空特定内置着色器选择"""
+    if self.specific_nodegroup is not None:
+        self.specific_builtin_shader = 'NONE'
+
+
+def _on_material_specific_builtin_shader_changed(self, context):
+    """当材质模式下的特定内置着色器改变时，清空材质模式下的特定节点组选择"""
+    if self.material_specific_builtin_shader != 'NONE':
+        self.material_specific_nodegroup = None
+
+
+def _on_material_specific_nodegroup_changed(self, context):
+    """当材质模式下的特定节点组改变时，清空材质模式下的特定内置着色器选择"""
+    if self.material_specific_nodegroup is not None:
+        self.material_specific_builtin_shader = 'NONE'
+
+
 class ShaderReplacerProperties(PropertyGroup):
     """插件属性定义"""
 
@@ -173,54 +238,18 @@ class ShaderReplacerProperties(PropertyGroup):
     builtin_shader: EnumProperty(
         name="内置着色器",
         description="选择Blender内置的着色器节点",
-        items=[
-            ('NONE', '-- 未选择 --', '不使用内置着色器'),
-            ('BSDF_PRINCIPLED', '原理化BSDF', '基础PBR着色器'),
-            ('BSDF_DIFFUSE', '漫射BSDF', '漫反射着色器'),
-            ('BSDF_GLOSSY', '光泽BSDF', '光泽着色器'),
-            ('BSDF_TRANSPARENT', '透明BSDF', '透明着色器'),
-            ('BSDF_GLASS', '玻璃BSDF', '玻璃着色器'),
-            ('BSDF_TRANSLUCENT', '半透明BSDF', '半透明着色器'),
-            ('BSDF_REFRACTION', '折射BSDF', '折射着色器'),
-            ('BSDF_TOON', '卡通BSDF', '卡通着色器'),
-            ('BSDF_SHEEN', '光泽BSDF', '光泽着色器'),
-            ('EMISSION', '自发光', '自发光着色器'),
-            ('SUBSURFACE_SCATTERING', '次表面散射', '次表面散射'),
-            ('VOLUME_ABSORPTION', '体积吸收', '体积吸收'),
-            ('VOLUME_SCATTER', '体积散射', '体积散射'),
-            ('VOLUME_PRINCIPLED', '原理化体积', '原理化体积着色器'),
-            ('MIX_SHADER', '混合着色器', '混合两个着色器'),
-            ('ADD_SHADER', '相加着色器', '相加两个着色器'),
-        ],
+        items=_BUILTIN_SHADER_ITEMS,
         default='NONE',
-        update=lambda self, context: self._on_builtin_shader_changed()
+        update=_on_builtin_shader_changed
     )
 
     # 替换特定着色器时的内置着色器选择
     specific_builtin_shader: EnumProperty(
         name="特定内置着色器",
         description="选择要替换的内置着色器",
-        items=[
-            ('NONE', '-- 未选择 --', '不使用内置着色器'),
-            ('BSDF_PRINCIPLED', '原理化BSDF', '基础PBR着色器'),
-            ('BSDF_DIFFUSE', '漫射BSDF', '漫反射着色器'),
-            ('BSDF_GLOSSY', '光泽BSDF', '光泽着色器'),
-            ('BSDF_TRANSPARENT', '透明BSDF', '透明着色器'),
-            ('BSDF_GLASS', '玻璃BSDF', '玻璃着色器'),
-            ('BSDF_TRANSLUCENT', '半透明BSDF', '半透明着色器'),
-            ('BSDF_REFRACTION', '折射BSDF', '折射着色器'),
-            ('BSDF_TOON', '卡通BSDF', '卡通着色器'),
-            ('BSDF_SHEEN', '光泽BSDF', '光泽着色器'),
-            ('EMISSION', '自发光', '自发光着色器'),
-            ('SUBSURFACE_SCATTERING', '次表面散射', '次表面散射'),
-            ('VOLUME_ABSORPTION', '体积吸收', '体积吸收'),
-            ('VOLUME_SCATTER', '体积散射', '体积散射'),
-            ('VOLUME_PRINCIPLED', '原理化体积', '原理化体积着色器'),
-            ('MIX_SHADER', '混合着色器', '混合两个着色器'),
-            ('ADD_SHADER', '相加着色器', '相加两个着色器'),
-        ],
+        items=_BUILTIN_SHADER_ITEMS,
         default='NONE',
-        update=lambda self, context: self._on_specific_builtin_shader_changed()
+        update=_on_specific_builtin_shader_changed
     )
 
     shader_type_manual: BoolProperty(
@@ -249,8 +278,8 @@ class ShaderReplacerProperties(PropertyGroup):
         name="节点组",
         description="选择一个着色器节点组",
         type=bpy.types.NodeTree,
-        poll=lambda self, node_tree: node_tree.type == 'SHADER',
-        update=lambda self, context: self._on_shader_nodegroup_changed()
+        poll=_poll_shader_tree,
+        update=_on_shader_nodegroup_changed
     )
     specific_shader_text: StringProperty(
         name="特定着色器",
@@ -263,8 +292,8 @@ class ShaderReplacerProperties(PropertyGroup):
         name="特定节点组",
         description="选择要替换的特定节点组",
         type=bpy.types.NodeTree,
-        poll=lambda self, node_tree: node_tree.type == 'SHADER',
-        update=lambda self, context: self._on_specific_nodegroup_changed()
+        poll=_poll_shader_tree,
+        update=_on_specific_nodegroup_changed
     )
     target_node_type_text: StringProperty(
         name="节点类型",
@@ -304,7 +333,7 @@ class ShaderReplacerProperties(PropertyGroup):
         name="材质特定内置着色器",
         description="选择要替换的特定内置着色器（材质模式）",
         items=get_available_shaders_for_specific,
-        update=lambda self, context: self._on_material_specific_builtin_shader_changed()
+        update=_on_material_specific_builtin_shader_changed
     )
 
     # 材质模式下的特定着色器选择 - 节点组
@@ -312,8 +341,8 @@ class ShaderReplacerProperties(PropertyGroup):
         name="材质特定节点组",
         description="选择要替换的特定节点组（材质模式）",
         type=bpy.types.NodeTree,
-        poll=lambda self, node_tree: node_tree.type == 'SHADER',
-        update=lambda self, context: self._on_material_specific_nodegroup_changed()
+        poll=_poll_shader_tree,
+        update=_on_material_specific_nodegroup_changed
     )
 
     # 特定着色器选择（下拉菜单）
@@ -358,37 +387,6 @@ class ShaderReplacerProperties(PropertyGroup):
         default='OBJECTS'
     )
 
-    # 互斥选择逻辑：当选择内置着色器时，清空节点组选择
-    def _on_builtin_shader_changed(self):
-        """当内置着色器改变时，清空节点组选择"""
-        if self.builtin_shader != 'NONE':
-            self.shader_nodegroup = None
-
-    def _on_shader_nodegroup_changed(self):
-        """当节点组改变时，清空内置着色器选择"""
-        if self.shader_nodegroup is not None:
-            self.builtin_shader = 'NONE'
-
-    def _on_specific_builtin_shader_changed(self):
-        """当特定内置着色器改变时，清空特定节点组选择"""
-        if self.specific_builtin_shader != 'NONE':
-            self.specific_nodegroup = None
-
-    def _on_specific_nodegroup_changed(self):
-        """当特定节点组改变时，清空特定内置着色器选择"""
-        if self.specific_nodegroup is not None:
-            self.specific_builtin_shader = 'NONE'
-
-    def _on_material_specific_builtin_shader_changed(self):
-        """当材质模式下的特定内置着色器改变时，清空材质模式下的特定节点组选择"""
-        if self.material_specific_builtin_shader != 'NONE':
-            self.material_specific_nodegroup = None
-
-    def _on_material_specific_nodegroup_changed(self):
-        """当材质模式下的特定节点组改变时，清空材质模式下的特定内置着色器选择"""
-        if self.material_specific_nodegroup is not None:
-            self.material_specific_builtin_shader = 'NONE'
-
     # 连接快照集合 - 用于记录断开前的连接关系
     connection_snapshot: CollectionProperty(
         type=ConnectionSnapshotItem
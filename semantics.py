@@ -0,0 +1,218 @@
+"""
+接口语义识别模块
+根据接口名称识别其用途（颜色、法线、粗糙度等），并给出语义之间的兼容性分数
+
+本模块只做纯字符串与整数运算，不依赖 bpy，便于单独测试或调整关键词。
+"""
+
+import re
+from enum import IntEnum
+from collections import defaultdict
+from functools import lru_cache
+
+
+class Sem(IntEnum):
+    """接口语义枚举（整数值用于索引兼容性表）"""
+    UNKNOWN = 0
+    COLOR = 1
+    NORMAL = 2
+    ROUGHNESS = 3
+    METALLIC = 4
+    ALPHA = 5
+    EMISSION = 6
+    SPECULAR = 7
+    SUBSURFACE = 8
+    AO = 9
+    DISPLACEMENT = 10
+
+
+# 接口语义关键词
+COLOR_KEYWORDS = ['color', 'base color',
+                  'diffuse', 'albedo', '颜色', '基础色', '漫反射', '反照率']
+NORMAL_KEYWORDS = ['normal', 'bump', '法线', '凹凸']
+ROUGHNESS_KEYWORDS = ['roughness', 'rough', 'glossy', 'gloss', '粗糙', '光泽']
+METALLIC_KEYWORDS = ['metallic', 'metal', '金属']
+ALPHA_KEYWORDS = ['alpha', 'opacity', 'transparency', '透明', '不透明', 'fac']
+EMISSION_KEYWORDS = ['emission', 'emissive', 'glow', '自发光', '发光']
+SPECULAR_KEYWORDS = ['specular', 'spec', 'reflection', '高光', '反射']
+SUBSURFACE_KEYWORDS = ['subsurface', 'sss', '次表面']
+AO_KEYWORDS = ['ao', 'ambient occlusion', 'occlusion', '环境光遮蔽', '遮蔽']
+DISPLACEMENT_KEYWORDS = ['displacement', 'height', 'disp', '置换', '高度']
+
+# 语义识别规则，顺序即优先级（与原 if 链一致）
+# 'base color' 需要先于 NORMAL 等判断，通用 'color' 则放在最后
+_SEMANTIC_RULES = (
+    (Sem.COLOR, ['base color', 'basecolor']),
+    (Sem.NORMAL, NORMAL_KEYWORDS),
+    (Sem.ROUGHNESS, ROUGHNESS_KEYWORDS),
+    (Sem.METALLIC, METALLIC_KEYWORDS),
+    (Sem.ALPHA, ALPHA_KEYWORDS),
+    (Sem.EMISSION, EMISSION_KEYWORDS),
+    (Sem.SPECULAR, SPECULAR_KEYWORDS),
+    (Sem.SUBSURFACE, SUBSURFACE_KEYWORDS),
+    (Sem.AO, AO_KEYWORDS),
+    (Sem.DISPLACEMENT, DISPLACEMENT_KEYWORDS),
+    (Sem.COLOR, ['color', '颜色']),
+)
+
+
+def _compile_semantic_rules(rules):
+    """将所有规则合并为一个正则，每条规则对应一个捕获组（组号 = 优先级 + 1）
+
+    整体包在零宽前瞻中，finditer 会在每个位置都尝试匹配，
+    因此重叠的关键词不会被跳过；同一位置上按组顺序取优先级最高的规则。
+    """
+    groups = ('({})'.format('|'.join(map(re.escape, keywords))) for _, keywords in rules)
+    return re.compile('(?=' + '|'.join(groups) + ')')
+
+
+_SEMANTIC_RE = _compile_semantic_rules(_SEMANTIC_RULES)
+_SEMANTIC_BY_GROUP = (Sem.UNKNOWN,) + tuple(semantic for semantic, _ in _SEMANTIC_RULES)
+
+
+class SocketSemantics:
+    """接口语义识别 - 识别接口的实际用途"""
+
+    __slots__ = ()
+
+    # 关键词列表定义在模块级，这里保留类属性以兼容原有访问方式
+    COLOR_KEYWORDS = COLOR_KEYWORDS
+    NORMAL_KEYWORDS = NORMAL_KEYWORDS
+    ROUGHNESS_KEYWORDS = ROUGHNESS_KEYWORDS
+    METALLIC_KEYWORDS = METALLIC_KEYWORDS
+    ALPHA_KEYWORDS = ALPHA_KEYWORDS
+    EMISSION_KEYWORDS = EMISSION_KEYWORDS
+    SPECULAR_KEYWORDS = SPECULAR_KEYWORDS
+    SUBSURFACE_KEYWORDS = SUBSURFACE_KEYWORDS
+    AO_KEYWORDS = AO_KEYWORDS
+    DISPLACEMENT_KEYWORDS = DISPLACEMENT_KEYWORDS
+
+    @staticmethod
+    def get_socket_semantic(socket_name: str) -> Sem:
+        return _semantic_of_name(socket_name)
+
+    @staticmethod
+    def are_semantically_compatible(output_semantic: Sem, input_semantic: Sem) -> int:
+        return _COMPAT[output_semantic * _SEM_COUNT + input_semantic]
+
+    @classmethod
+    def bucket_sockets(cls, sockets):
+        """
+        按语义将接口分桶（一次遍历）
+
+        返回:
+            defaultdict: Sem -> [(序号, 接口), ...]，桶内按序号升序
+        """
+        sockets = list(sockets)
+        buckets = defaultdict(list)
+        for semantic, indices in _bucket_layout(tuple(sock.name for sock in sockets)):
+            buckets[semantic] = [(idx, sockets[idx]) for idx in indices]
+        return buckets
+
+    @classmethod
+    def find_compatible_input(cls, output_semantic, buckets, connected_inputs, min_score=1):
+        """
+        在分桶后的输入接口中查找与输出语义最兼容的未连接接口
+
+        只检查兼容分数不低于 min_score 的语义桶；分数相同时取序号最小的接口，
+        与逐个接口比较分数的结果一致。
+
+        返回:
+            (接口, 分数)，没有找到时返回 (None, 0)
+        """
+        best_input = None
+        best_idx = -1
+        best_score = 0
+        for score, input_semantic in _COMPAT_PARTNERS[output_semantic]:
+            if score < min_score or score < best_score:
+                break
+            for idx, inp in buckets.get(input_semantic, ()):
+                if inp in connected_inputs:
+                    continue
+                if best_input is None or idx < best_idx:
+                    best_input, best_idx, best_score = inp, idx, score
+                break
+        return best_input, best_score
+
+    @classmethod
+    def cache_clear(cls):
+        """清空语义识别缓存（关键词修改后或测试时使用）"""
+        _bucket_layout.cache_clear()
+        _semantic_of_name.cache_clear()
+        _semantic_of.cache_clear()
+
+
+@lru_cache(maxsize=2048)
+def _semantic_of(name_lower: str) -> Sem:
+    """根据小写接口名称识别语义（带缓存，接口名称在材质间高度重复）
+
+    一次扫描找出所有命中的规则，取优先级最高的一条。
+    """
+    best = 0
+    for match in _SEMANTIC_RE.finditer(name_lower):
+        group = match.lastindex
+        if not best or group < best:
+            best = group
+            if best == 1:
+                break
+    return _SEMANTIC_BY_GROUP[best]
+
+
+@lru_cache(maxsize=512)
+def _semantic_of_name(socket_name: str) -> Sem:
+    """按原始接口名称缓存语义，命中时连 lower() 也省去"""
+    return _semantic_of(socket_name.lower())
+
+
+@lru_cache(maxsize=256)
+def _bucket_layout(socket_names):
+    """按接口名称元组缓存分桶布局: ((语义, (序号, ...)), ...)
+
+    同类型着色器节点的输入接口名称相同，批量处理多个材质时可直接复用。
+    """
+    layout = defaultdict(list)
+    for idx, name in enumerate(socket_names):
+        layout[_semantic_of_name(name)].append(idx)
+    return tuple((semantic, tuple(indices)) for semantic, indices in layout.items())
+
+
+# 不同语义之间的兼容性分数（相同语义固定为 100）
+_CROSS_COMPATIBILITY = {
+    (Sem.COLOR, Sem.EMISSION): 80,
+    (Sem.ROUGHNESS, Sem.SPECULAR): 60,
+    (Sem.AO, Sem.ROUGHNESS): 40,
+    (Sem.AO, Sem.SPECULAR): 40,
+}
+
+_SEM_COUNT = len(Sem)
+
+
+def _build_compatibility_table():
+    """构建扁平的兼容性表，按 output * _SEM_COUNT + input 索引"""
+    table = bytearray(_SEM_COUNT * _SEM_COUNT)
+    for sem in Sem:
+        table[sem * _SEM_COUNT + sem] = 100
+    for (output_semantic, input_semantic), score in _CROSS_COMPATIBILITY.items():
+        table[output_semantic * _SEM_COUNT + input_semantic] = score
+    return bytes(table)
+
+
+_COMPAT = _build_compatibility_table()
+
+
+def _build_compatible_partners():
+    """为每个输出语义列出兼容的输入语义，按分数从高到低排列: ((分数, 输入语义), ...)"""
+    partners = []
+    for output_semantic in Sem:
+        row = [
+            (_COMPAT[output_semantic * _SEM_COUNT + input_semantic], input_semantic)
+            for input_semantic in Sem
+        ]
+        partners.append(tuple(sorted(
+            (item for item in row if item[0] > 0),
+            key=lambda item: item[0], reverse=True
+        )))
+    return tuple(partners)
+
+
+_COMPAT_PARTNERS = _build_compatible_partners()
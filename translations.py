@@ -117,4 +117,24 @@ translations_dict = {
         ("*", "Rule Settings:"): "规则设置：",
         ("Panel", "Rule {} Settings:"): "规则 {} 设置：",
     }
-}
\ No newline at end of file
+}
+
+
+# 记录翻译是否已注册，避免重复注册或注销未注册的翻译
+_registered = False
+
+
+def register():
+    """注册翻译（已注册时跳过）"""
+    global _registered
+    if not _registered:
+        bpy.app.translations.register(__package__, translations_dict)
+        _registered = True
+
+
+def unregister():
+    """注销翻译（仅在已注册时）"""
+    global _registered
+    if _registered:
+        bpy.app.translations.unregister(__package__)
+        _registered = False
@@ -8,18 +8,27 @@ from bpy.types import Panel, UIList
 from .node_config import NODE_TYPE_NAMES, NodeTypeConfig
 
 
+# 多处面板分支共用的标签文本
+_LABEL_SHADER_TO_REPLACE = "要替换的着色器:"
+_LABEL_TARGET_MATERIAL = "目标材质:"
+_LABEL_NO_MATERIAL = "⚠ 请选择要替换的材质"
+
+# 断开连接按钮在各替换模式下的显示文本
+_DISCONNECT_LABELS = {
+    'ALL': "断开所有连接",
+    'SPECIFIC': "断开特定连接",
+    'MATERIAL': "断开特定材质连接",
+    'MATERIAL_SPECIFIC': "断开特定材质中的特定连接"
+}
+
+
 def get_disconnect_button_label(replace_mode):
     """根据替换模式获取断开连接按钮的显示文本"""
-    button_labels = {
-        'ALL': "断开所有连接",
-        'SPECIFIC': "断开特定连接",
-        'MATERIAL': "断开特定材质连接",
-        'MATERIAL_SPECIFIC': "断开特定材质中的特定连接"
-    }
-    return button_labels.get(replace_mode, "断开所有连接")
+    return _DISCONNECT_LABELS.get(replace_mode, "断开所有连接")
 
 
-def draw_shader_selector(layout, props, nodegroup_prop, builtin_prop, label_text):
+def draw_shader_selector(layout, props, nodegroup_prop, builtin_prop, label_text,
+                         nodegroup_value, builtin_value):
     """
     统一的着色器选择器UI组件
 
@@ -29,6 +38,8 @@ def draw_shader_selector(layout, props, nodegroup_prop, builtin_prop, label_text
         nodegroup_prop: 节点组PointerProperty属性名
         builtin_prop: 内置着色器EnumProperty属性名
         label_text: 标签文字
+        nodegroup_value: 调用方直接读取的节点组属性当前值
+        builtin_value: 调用方直接读取的内置着色器属性当前值
     """
     box = layout.box()
     box.label(text=label_text, icon='NODE_MATERIAL')
@@ -45,22 +56,51 @@ def draw_shader_selector(layout, props, nodegroup_prop, builtin_prop, label_text
                     "node_groups", text="", icon='NODETREE')
 
     # 显示当前选中的信息
-    builtin_value = getattr(props, builtin_prop)
-    nodegroup_value = getattr(props, nodegroup_prop)
-
     if nodegroup_value:
         box.label(text=f"✓ 已选择节点组: {nodegroup_value.name}", icon='CHECKMARK')
     elif builtin_value and builtin_value != 'NONE':
         # 显示内置着色器的中文名称
-        builtin_name = NodeTypeConfig.BUILTIN_SHADERS_FOR_MENU
-        for item in builtin_name:
-            if item[0] == builtin_value:
-                box.label(text=f"✓ 已选择内置: {item[1]}", icon='CHECKMARK')
-                break
+        builtin_label = NodeTypeConfig.BUILTIN_SHADER_MENU_LABELS.get(builtin_value)
+        if builtin_label:
+            box.label(text=f"✓ 已选择内置: {builtin_label}", icon='CHECKMARK')
 
     return box
 
 
+def draw_material_picker(layout, props):
+    """
+    目标材质选择器UI组件（替换特定材质的两种模式共用）
+
+    参数:
+        layout: UI布局对象
+        props: 属性集合对象
+    """
+    material_box = layout.box()
+    material_box.label(text=_LABEL_TARGET_MATERIAL, icon='MATERIAL')
+
+    # prop_search 材质搜索框 - 完美支持中文
+    row = material_box.row(align=True)
+    row.prop_search(props, "target_material", bpy.data, "materials",
+                    text="", icon='MATERIAL_DATA')
+
+    # 显示当前选中的材质信息
+    target_material = props.target_material
+    if target_material:
+        material_box.label(
+            text=f"✓ 已选择: {target_material.name}", icon='CHECKMARK')
+    else:
+        material_box.label(text=_LABEL_NO_MATERIAL, icon='INFO')
+
+    return material_box
+
+
+def _rule_node_text(match_mode, node_label, node_type):
+    """规则列表中节点的显示文本：按标签匹配显示标签，否则显示节点类型名称"""
+    if match_mode == 'LABEL':
+        return node_label or "未设置"
+    return NODE_TYPE_NAMES.get(node_type) or node_type or "未设置"
+
+
 class MATERIAL_UL_connection_rule_list(UIList):
     """连接规则列表UI"""
 
@@ -68,23 +108,10 @@ class MATERIAL_UL_connection_rule_list(UIList):
         if self.layout_type in {'DEFAULT', 'COMPACT'}:
             row = layout.row(align=True)
 
-            # 源节点显示
-            if item.source_match_mode == 'LABEL':
-                source_text = item.source_node_label if item.source_node_label else "未设置"
-            else:
-                if item.source_node_type and item.source_node_type in NODE_TYPE_NAMES:
-                    source_text = NODE_TYPE_NAMES[item.source_node_type]
-                else:
-                    source_text = item.source_node_type if item.source_node_type else "未设置"
-
-            # 目标节点显示
-            if item.target_match_mode == 'LABEL':
-                target_text = item.target_node_label if item.target_node_label else "未设置"
-            else:
-                if item.target_node_type and item.target_node_type in NODE_TYPE_NAMES:
-                    target_text = NODE_TYPE_NAMES[item.target_node_type]
-                else:
-                    target_text = item.target_node_type if item.target_node_type else "未设置"
+            source_text = _rule_node_text(
+                item.source_match_mode, item.source_node_label, item.source_node_type)
+            target_text = _rule_node_text(
+                item.target_match_mode, item.target_node_label, item.target_node_type)
 
             row.label(text=f"{source_text}[{item.source_socket_index}]")
             row.label(text="→", icon='FORWARD')
@@ -94,14 +121,8 @@ class MATERIAL_UL_connection_rule_list(UIList):
             layout.label(text="", icon='LINKED')
 
 
-class MATERIAL_PT_shader_replacer_panel(Panel):
-    """材质着色器替换面板 - 放在3D视图侧边栏"""
-
-    bl_label = "材质替换工具"
-    bl_idname = "MATERIAL_PT_shader_replacer"
-    bl_space_type = 'VIEW_3D'
-    bl_region_type = 'UI'
-    bl_category = '材质工具'
+class _ShaderReplacerPanelMixin:
+    """两个替换工具面板共用的绘制逻辑，子类只需提供 bl_* 元数据"""
 
     def draw(self, context):
         layout = self.layout
@@ -113,7 +134,9 @@ class MATERIAL_PT_shader_replacer_panel(Panel):
             layout, props,
             nodegroup_prop="shader_nodegroup",
             builtin_prop="builtin_shader",
-            label_text="目标着色器:"
+            label_text="目标着色器:",
+            nodegroup_value=props.shader_nodegroup,
+            builtin_value=props.builtin_shader
         )
 
         # 目标选择
@@ -134,72 +157,28 @@ class MATERIAL_PT_shader_replacer_panel(Panel):
                 layout, props,
                 nodegroup_prop="specific_nodegroup",
                 builtin_prop="specific_builtin_shader",
-                label_text="要替换的着色器:"
+                label_text=_LABEL_SHADER_TO_REPLACE,
+                nodegroup_value=props.specific_nodegroup,
+                builtin_value=props.specific_builtin_shader
             )
 
         # 当选择"替换特定材质"模式时,显示材质选择器（在替换设置和自动连接之间）
         elif props.replace_mode == 'MATERIAL':
-            material_box = layout.box()
-            material_box.label(text="目标材质:", icon='MATERIAL')
-
-            # prop_search 材质搜索框 - 完美支持中文
-            row = material_box.row(align=True)
-            row.prop_search(props, "target_material", bpy.data, "materials",
-                            text="", icon='MATERIAL_DATA')
-
-            # 显示当前选中的材质信息
-            if props.target_material:
-                material_box.label(
-                    text=f"✓ 已选择: {props.target_material.name}", icon='CHECKMARK')
-            else:
-                material_box.label(text="⚠ 请选择要替换的材质", icon='INFO')
-
-        # 当选择"替换特定材质中的特定着色器"模式时
-        elif props.replace_mode == 'MATERIAL_SPECIFIC':
-            # 材质选择器
-            material_box = layout.box()
-            material_box.label(text="目标材质:", icon='MATERIAL')
-
-            row = material_box.row(align=True)
-            row.prop_search(props, "target_material", bpy.data, "materials",
-                            text="", icon='MATERIAL_DATA')
-
-            if props.target_material:
-                material_box.label(
-                    text=f"✓ 已选择: {props.target_material.name}", icon='CHECKMARK')
-            else:
-                material_box.label(text="⚠ 请选择要替换的材质", icon='INFO')
-
-            # 特定着色器选择器（在材质选择和自动连接之间）
-            draw_shader_selector(
-                layout, props,
-                nodegroup_prop="material_specific_nodegroup",
-                builtin_prop="material_specific_builtin_shader",
-                label_text="要替换的着色器:"
-            )
+            draw_material_picker(layout, props)
 
         # 当选择"替换特定材质中的特定着色器"模式时
         elif props.replace_mode == 'MATERIAL_SPECIFIC':
             # 材质选择器
-            material_box = layout.box()
-            material_box.label(text="目标材质:", icon='MATERIAL')
-
-            row = material_box.row(align=True)
-            row.prop_search(props, "target_material", bpy.data, "materials",
-                            text="", icon='MATERIAL_DATA')
-
-            if props.target_material:
-                material_box.label(
-                    text=f"✓ 已选择: {props.target_material.name}", icon='CHECKMARK')
-            else:
-                material_box.label(text="⚠ 请选择要替换的材质", icon='INFO')
+            draw_material_picker(layout, props)
 
             # 特定着色器选择器（在材质选择和自动连接之间）
             draw_shader_selector(
                 layout, props,
                 nodegroup_prop="material_specific_nodegroup",
                 builtin_prop="material_specific_builtin_shader",
-                label_text="要替换的着色器:"
+                label_text=_LABEL_SHADER_TO_REPLACE,
+                nodegroup_value=props.material_specific_nodegroup,
+                builtin_value=props.material_specific_builtin_shader
             )
 
         # 连接选项
@@ -231,9 +210,9 @@ class MATERIAL_PT_shader_replacer_panel(Panel):
         row.operator("material.reconnect_with_rules",
                      text="使用规则重新连接", icon='LINKED')
 
-        # 连接快照状态显示
-        if props.connection_snapshot:
-            snapshot_count = len(props.connection_snapshot)
+        # 连接快照状态显示（集合长度只读取一次）
+        snapshot_count = len(props.connection_snapshot)
+        if snapshot_count:
             snapshot_box = advanced_box.box()
             row = snapshot_box.row(align=True)
             row.label(text=f"已记录 {snapshot_count} 个连接关系", icon='INFO')
@@ -250,54 +229,74 @@ class MATERIAL_PT_shader_replacer_panel(Panel):
         # 连接规则说明
         advanced_box.label(text="自定义连接规则:")
 
-        # 连接规则列表
-        row = advanced_box.row()
-        row.template_list(
-            "MATERIAL_UL_connection_rule_list", "",
-            props, "connection_rules",
-            props, "active_rule_index",
-            rows=3
-        )
+        rules = props.connection_rules
+        rule_count = len(rules)
+
+        # 有规则时才构建列表控件和规则详细设置
+        if rule_count:
+            # 连接规则列表
+            row = advanced_box.row()
+            row.template_list(
+                "MATERIAL_UL_connection_rule_list", "",
+                props, "connection_rules",
+                props, "active_rule_index",
+                rows=3
+            )
 
-        # 添加/删除规则按钮
-        col = row.column(align=True)
-        col.operator("material.add_connection_rule", icon='ADD', text="")
-        col.operator("material.remove_connection_rule", icon='REMOVE', text="")
+            # 添加/删除规则按钮
+            col = row.column(align=True)
+            col.operator("material.add_connection_rule", icon='ADD', text="")
+            col.operator("material.remove_connection_rule", icon='REMOVE', text="")
 
-        # 显示当前选中规则的详细设置
-        if props.connection_rules and 0 <= props.active_rule_index < len(props.connection_rules):
-            rule = props.connection_rules[props.active_rule_index]
+            # 显示当前选中规则的详细设置
+            active_index = props.active_rule_index
+            if 0 <= active_index < rule_count:
+                rule = rules[active_index]
 
-            rule_box = advanced_box.box()
-            rule_box.label(
-                text=f"规则 {props.active_rule_index + 1} 详细设置:", icon='SETTINGS')
+                rule_box = advanced_box.box()
+                rule_box.label(
+                    text=f"规则 {active_index + 1} 详细设置:", icon='SETTINGS')
 
-            # 源节点设置
-            source_box = rule_box.box()
-            source_box.label(text="源节点 (输出端):", icon='EXPORT')
-            source_box.prop(rule, "source_match_mode", text="匹配方式")
+                # 源节点设置
+                source_box = rule_box.box()
+                source_box.label(text="源节点 (输出端):", icon='EXPORT')
+                source_box.prop(rule, "source_match_mode", text="匹配方式")
 
-            if rule.source_match_mode == 'LABEL':
-                source_box.prop(rule, "source_node_label", text="标签/名称")
-            else:
-                source_box.prop(rule, "source_node_type", text="节点类型")
+                if rule.source_match_mode == 'LABEL':
+                    source_box.prop(rule, "source_node_label", text="标签/名称")
+                else:
+                    source_box.prop(rule, "source_node_type", text="节点类型")
 
-            source_box.prop(rule, "source_socket_index", text="输出接口索引")
+                source_box.prop(rule, "source_socket_index", text="输出接口索引")
 
-            # 目标节点设置
-            target_box = rule_box.box()
-            target_box.label(text="目标节点 (输入端):", icon='IMPORT')
-            target_box.prop(rule, "target_match_mode", text="匹配方式")
+                # 目标节点设置
+                target_box = rule_box.box()
+                target_box.label(text="目标节点 (输入端):", icon='IMPORT')
+                target_box.prop(rule, "target_match_mode", text="匹配方式")
 
-            if rule.target_match_mode == 'LABEL':
-                target_box.prop(rule, "target_node_label", text="标签/名称")
-            else:
-                target_box.prop(rule, "target_node_type", text="节点类型")
+                if rule.target_match_mode == 'LABEL':
+                    target_box.prop(rule, "target_node_label", text="标签/名称")
+                else:
+                    target_box.prop(rule, "target_node_type", text="节点类型")
+
+                target_box.prop(rule, "target_socket_index", text="输入接口索引")
+        else:
+            # 还没有规则时只显示添加按钮
+            row = advanced_box.row()
+            row.operator("material.add_connection_rule", icon='ADD', text="")
 
-            target_box.prop(rule, "target_socket_index", text="输入接口索引")
 
+class MATERIAL_PT_shader_replacer_panel(_ShaderReplacerPanelMixin, Panel):
+    """材质着色器替换面板 - 放在3D视图侧边栏"""
+
+    bl_label = "材质替换工具"
+    bl_idname = "MATERIAL_PT_shader_replacer"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = '材质工具'
 
-class MATERIAL_PT_shader_replacer_material(Panel):
+
+class MATERIAL_PT_shader_replacer_material(_ShaderReplacerPanelMixin, Panel):
     """材质属性面板中的替换工具"""
 
     bl_label = "材质替换工具"
@@ -305,151 +304,5 @@ class MATERIAL_PT_shader_replacer_material(Panel):
     bl_space_type = 'PROPERTIES'
     bl_region_type = 'WINDOW'
     bl_context = 'material'
-
-    def draw(self, context):
-        layout = self.layout
-        scene = context.scene
-        props = scene.shader_replacer_props
-
-        # 使用统一的着色器选择器
-        draw_shader_selector(
-            layout, props,
-            nodegroup_prop="shader_nodegroup",
-            builtin_prop="builtin_shader",
-            label_text="目标着色器:"
-        )
-
-        # 目标选择
-        box = layout.box()
-        box.label(text="目标选择:", icon='OBJECT_DATA')
-        row = box.row()
-        row.prop(props, "target_type", expand=True)
-
-        # 替换模式
-        box = layout.box()
-        box.label(text="替换设置:", icon='TOOL_SETTINGS')
-        box.prop(props, "replace_mode", text="")
-
-        # 当选择"替换特定着色器"模式时（在替换设置和自动连接之间）
-        if props.replace_mode == 'SPECIFIC':
-            # 使用统一的着色器选择器
-            draw_shader_selector(
-                layout, props,
-                nodegroup_prop="specific_nodegroup",
-                builtin_prop="specific_builtin_shader",
-                label_text="要替换的着色器:"
-            )
-
-        # 当选择"替换特定材质"模式时,显示材质选择器（在替换设置和自动连接之间）
-        elif props.replace_mode == 'MATERIAL':
-            material_box = layout.box()
-            material_box.label(text="目标材质:", icon='MATERIAL')
-
-            # prop_search 材质搜索框 - 完美支持中文
-            row = material_box.row(align=True)
-            row.prop_search(props, "target_material", bpy.data, "materials",
-                            text="", icon='MATERIAL_DATA')
-
-            # 显示当前选中的材质信息
-            if props.target_material:
-                material_box.label(
-                    text=f"✓ 已选择: {props.target_material.name}", icon='CHECKMARK')
-            else:
-                material_box.label(text="⚠ 请选择要替换的材质", icon='INFO')
-
-        # 连接选项
-        box = layout.box()
-        box.prop(props, "auto_connect")
-
-        # 高级选项
-        box = layout.box()
-        box.prop(props, "advanced_options", icon='PREFERENCES')
-        if props.advanced_options:
-            self.draw_advanced_options(context, box, props)
-
-        # 执行按钮
-        col = layout.column()
-        col.scale_y = 1.5
-        col.operator(
-            "material.batch_replace_shader",
-            text="批量替换着色器",
-            icon='MATERIAL'
-        )
-
-    def draw_advanced_options(self, context, parent_box, props):
-        """绘制高级选项"""
-        advanced_box = parent_box.box()
-        advanced_box.label(text="高级连接设置:", icon='LINKED')
-
-        # 断开和重新连接按钮
-        row = advanced_box.row(align=True)
-        disconnect_label = get_disconnect_button_label(props.replace_mode)
-        row.operator("material.disconnect_all_connections",
-                     text=disconnect_label, icon='X')
-        row.operator("material.reconnect_with_rules",
-                     text="使用规则重新连接", icon='LINKED')
-
-        # 连接快照状态显示
-        if props.connection_snapshot:
-            snapshot_count = len(props.connection_snapshot)
-            snapshot_box = advanced_box.box()
-            row = snapshot_box.row(align=True)
-            row.label(text=f"已记录 {snapshot_count} 个连接关系", icon='INFO')
-            row.operator("material.clear_connection_snapshot", text="清空快照", icon='TRASH')
-        else:
-            row = advanced_box.row(align=True)
-            row.label(text="暂无连接关系记录", icon='INFO')
-        
-        # 连接关系记录启用/禁用开关（动态文本）
-        row = advanced_box.row(align=True)
-        record_text = "禁用连接关系记录" if props.enable_connection_recording else "启用连接关系记录"
-        row.prop(props, "enable_connection_recording", text=record_text)
-
-        # 连接规则说明
-        advanced_box.label(text="自定义连接规则:")
-
-        # 连接规则列表
-        row = advanced_box.row()
-        row.template_list(
-            "MATERIAL_UL_connection_rule_list", "",
-            props, "connection_rules",
-            props, "active_rule_index",
-            rows=3
-        )
-
-        # 添加/删除规则按钮
-        col = row.column(align=True)
-        col.operator("material.add_connection_rule", icon='ADD', text="")
-        col.operator("material.remove_connection_rule", icon='REMOVE', text="")
-
-        # 显示当前选中规则的详细设置
-        if props.connection_rules and 0 <= props.active_rule_index < len(props.connection_rules):
-            rule = props.connection_rules[props.active_rule_index]
-
-            rule_box = advanced_box.box()
-            rule_box.label(
-                text=f"规则 {props.active_rule_index + 1} 详细设置:", icon='SETTINGS')
-
-            # 源节点设置
-            source_box = rule_box.box()
-            source_box.label(text="源节点 (输出端):", icon='EXPORT')
-            source_box.prop(rule, "source_match_mode", text="匹配方式")
-
-            if rule.source_match_mode == 'LABEL':
-                source_box.prop(rule, "source_node_label", text="标签/名称")
-            else:
-                source_box.prop(rule, "source_node_type", text="节点类型")
-
-            source_box.prop(rule, "source_socket_index", text="输出接口索引")
-
-            # 目标节点设置
-            target_box = rule_box.box()
-            target_box.label(text="目标节点 (输入端):", icon='IMPORT')
-            target_box.prop(rule, "target_match_mode", text="匹配方式")
-
-            if rule.target_match_mode == 'LABEL':
-                target_box.prop(rule, "target_node_label", text="标签/名称")
-            else:
-                target_box.prop(rule, "target_node_type", text="节点类型")
-
-            target_box.prop(rule, "target_socket_index", text="输入接口索引")
+    # 与材质属性中的其他面板并列，默认折叠；折叠时 Blender 不会调用 draw
+    bl_options = {'DEFAULT_CLOSED'}